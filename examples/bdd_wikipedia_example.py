@@ -35,30 +35,37 @@ if len(sys.argv) > 1:
 print(f"Using compilation method: {compilation_method.upper()}")
 print("=" * 60)
 
+# Node dumps are built as one buffer; large MDDs are written to a file instead of stdout
+MAX_PRINTED_NODES = 64
+
+def describe_node(mdd, i, node):
+    layer_name = mdd.dim_names[node.layer] if node.layer < len(mdd.dim_names) else "Terminal"
+    edges_str = ", ".join(f"{k}->{v}" for k, v in sorted(node.edges.items()))
+    term_info = f" [TERMINAL: {node.terminal_count} paths]" if node.terminal_count > 0 else ""
+    return f"Node {i} (layer {node.layer}: {layer_name}): edges=[{edges_str}]{term_info}"
+
+def dump_nodes(mdd, dump_path):
+    lines = [describe_node(mdd, i, node) for i, node in enumerate(mdd.nodes)]
+    if len(lines) <= MAX_PRINTED_NODES:
+        sys.stdout.write("\n".join(lines) + "\n")
+    else:
+        with open(dump_path, "w") as fh:
+            fh.write("\n".join(lines) + "\n")
+        print(f"{len(lines)} nodes; structure written to {dump_path}")
+
 # Create truth table for the custom function
 # as defined by the user's truth table.
+# Packed truth table: bit i holds f for input i = x1*4 + x2*2 + x3
+TRUTH = 0b11001001
+
 def custom_function(x1, x2, x3):
-    # Implemented as a lookup table for clarity
-    return {
-        (0, 0, 0): 1,
-        (0, 0, 1): 0,
-        (0, 1, 0): 0,
-        (0, 1, 1): 1,
-        (1, 0, 0): 0,
-        (1, 0, 1): 0,
-        (1, 1, 0): 1,
-        (1, 1, 1): 1,
-    }[(x1, x2, x3)]
-
-# Generate all combinations
-rows = []
-for x1 in [0, 1]:
-    for x2 in [0, 1]:
-        for x3 in [0, 1]:
-            f = custom_function(x1, x2, x3)
-            rows.append({"x1": x1, "x2": x2, "x3": x3, "f": f})
-
-df = pd.DataFrame(rows)
+    return (TRUTH >> ((x1 << 2) | (x2 << 1) | x3)) & 1
+
+# Generate all combinations in one shot (rows in x1, x2, x3 lexicographic order)
+X = np.array(np.meshgrid([0, 1], [0, 1], [0, 1], indexing="ij")).reshape(3, -1).T
+f = ((TRUTH >> ((X[:, 0] << 2) | (X[:, 1] << 1) | X[:, 2])) & 1).astype(np.int8)
+
+df = pd.DataFrame({"x1": X[:, 0], "x2": X[:, 1], "x3": X[:, 2], "f": f})
 print("Truth Table for Custom Function f(x1,x2,x3):")
 print(df.to_string(index=False))
 print()
@@ -86,11 +93,7 @@ print()
 # Show the structure
 print("MDD Node Structure:")
 print("-" * 60)
-for i, node in enumerate(mdd.nodes):
-    layer_name = mdd.dim_names[node.layer] if node.layer < len(mdd.dim_names) else "Terminal"
-    edges_str = ", ".join(f"{k}->{v}" for k, v in sorted(node.edges.items()))
-    term_info = f" [TERMINAL: {node.terminal_count} paths]" if node.terminal_count > 0 else ""
-    print(f"Node {i} (layer {node.layer}: {layer_name}): edges=[{edges_str}]{term_info}")
+dump_nodes(mdd, f"bdd_nodes_{compilation_method}.txt")
 
 print()
 print("=" * 60)
@@ -99,8 +102,12 @@ print("=" * 60)
 
 # Visualization
 try:
+    # Figures are only saved to disk, so skip interactive backend discovery
+    import matplotlib
+    matplotlib.use('Agg')
     import matplotlib.pyplot as plt
     import matplotlib.patches as mpatches
+    from matplotlib.collections import PatchCollection
 
     def draw_bdd_style(mdd, title="Binary Decision Diagram", save_path=None):
         """Draw MDD in classic BDD style with proper layout."""
@@ -113,8 +120,8 @@ try:
 
         # Calculate positions - top to bottom layout
         pos = {}
-        layer_widths = {layer: len(nodes) for layer, nodes in layers.items()}
-        max_width = max(layer_widths.values())
+        layer_node_counts = {layer: len(nodes) for layer, nodes in layers.items()}
+        max_width = max(layer_node_counts.values())
 
         for layer, nodes in layers.items():
             width = len(nodes)
@@ -146,28 +153,30 @@ try:
                 ax.text(mid_x + offset_x, mid_y, str(label), fontsize=10,
                        fontweight='bold', color=label_color, ha='center', va='center')
 
-        # Draw nodes
-        for node_id, (x, y) in pos.items():
-            node = mdd.nodes[node_id]
-
-            if node.terminal_count > 0:
-                # Terminal nodes - squares
-                rect = mpatches.FancyBboxPatch((x - 0.35, y - 0.35), 0.7, 0.7,
-                                               boxstyle="round,pad=0.05",
-                                               facecolor='#f39c12', edgecolor='#d68910',
-                                               linewidth=2)
-                ax.add_patch(rect)
-                # Show terminal count
-                ax.text(x, y, f"T\n({node.terminal_count})", fontsize=9,
-                       fontweight='bold', ha='center', va='center')
-            else:
-                # Decision nodes - circles
-                layer_name = mdd.dim_names[node.layer] if node.layer < len(mdd.dim_names) else "?"
-                circle = plt.Circle((x, y), 0.4, facecolor='#3498db',
-                                    edgecolor='#2980b9', linewidth=2)
-                ax.add_patch(circle)
-                ax.text(x, y, layer_name, fontsize=11, fontweight='bold',
-                       ha='center', va='center', color='white')
+        # Draw nodes: one PatchCollection per node style instead of one patch artist per node
+        term_ids = [i for i in pos if mdd.nodes[i].terminal_count > 0]
+        decision_ids = [i for i in pos if mdd.nodes[i].terminal_count == 0]
+        # Decision nodes - circles
+        ax.add_collection(PatchCollection(
+            [plt.Circle(pos[i], 0.4) for i in decision_ids],
+            facecolors='#3498db', edgecolors='#2980b9', linewidths=2, zorder=2))
+        # Terminal nodes - squares
+        ax.add_collection(PatchCollection(
+            [mpatches.FancyBboxPatch((pos[i][0] - 0.35, pos[i][1] - 0.35), 0.7, 0.7,
+                                     boxstyle="round,pad=0.05") for i in term_ids],
+            facecolors='#f39c12', edgecolors='#d68910', linewidths=2, zorder=2))
+
+        for node_id in term_ids:
+            x, y = pos[node_id]
+            # Show terminal count
+            ax.text(x, y, f"T\n({mdd.nodes[node_id].terminal_count})", fontsize=9,
+                   fontweight='bold', ha='center', va='center')
+        for node_id in decision_ids:
+            x, y = pos[node_id]
+            layer = mdd.nodes[node_id].layer
+            layer_name = mdd.dim_names[layer] if layer < len(mdd.dim_names) else "?"
+            ax.text(x, y, layer_name, fontsize=11, fontweight='bold',
+                   ha='center', va='center', color='white')
 
         # Add legend
         legend_elements = [
@@ -196,7 +205,7 @@ try:
                        facecolor='white', edgecolor='none')
             print(f"Saved to: {save_path}")
 
-        plt.show()
+        plt.close(fig)
 
     # Draw the MDD
     draw_bdd_style(mdd, title=f"MDD for Custom Function f(x1,x2,x3) [{compilation_method.upper()}]",
@@ -222,7 +231,8 @@ test_cases = [
 
 for tc in test_cases:
     matches = mdd.match(tc)
-    print(f"Input: {tc} -> Output f: {[m['f'] for m in matches]}")
+    expected = custom_function(tc["x1"], tc["x2"], tc["x3"])
+    print(f"Input: {tc} -> Output f: {[m['f'] for m in matches]} (expected {expected})")
 
 print()
 print("All paths where f=1 (custom function true):")
@@ -16,32 +16,41 @@ The function is defined by the following truth table:
 
 import pandas as pd
 import numpy as np
+import sys
+import time
 from mdd4tables import Schema, DimensionSpec, DimensionType, BuildConfig, Builder
 
+# Node dumps are built as one buffer; large MDDs are written to a file instead of stdout
+MAX_PRINTED_NODES = 64
+
+def describe_node(mdd, i, node):
+    layer_name = mdd.dim_names[node.layer] if node.layer < len(mdd.dim_names) else "Terminal"
+    edges_str = ", ".join(f"{k}->{v}" for k, v in sorted(node.edges.items()))
+    term_info = f" [TERMINAL: {node.terminal_count} paths]" if node.terminal_count > 0 else ""
+    return f"Node {i} (layer {node.layer}: {layer_name}): edges=[{edges_str}]{term_info}"
+
+def dump_nodes(mdd, dump_path):
+    lines = [describe_node(mdd, i, node) for i, node in enumerate(mdd.nodes)]
+    if len(lines) <= MAX_PRINTED_NODES:
+        sys.stdout.write("\n".join(lines) + "\n")
+    else:
+        with open(dump_path, "w") as fh:
+            fh.write("\n".join(lines) + "\n")
+        print(f"{len(lines)} nodes; structure written to {dump_path}")
+
 # Create truth table for the custom function
 # as defined by the user's truth table.
+# Packed truth table: bit i holds f for input i = x1*4 + x2*2 + x3
+TRUTH = 0b11001001
+
 def custom_function(x1, x2, x3):
-    # Implemented as a lookup table for clarity
-    return {
-        (0, 0, 0): 1,
-        (0, 0, 1): 0,
-        (0, 1, 0): 0,
-        (0, 1, 1): 1,
-        (1, 0, 0): 0,
-        (1, 0, 1): 0,
-        (1, 1, 0): 1,
-        (1, 1, 1): 1,
-    }[(x1, x2, x3)]
-
-# Generate all combinations
-rows = []
-for x1 in [0, 1]:
-    for x2 in [0, 1]:
-        for x3 in [0, 1]:
-            f = custom_function(x1, x2, x3)
-            rows.append({"x1": x1, "x2": x2, "x3": x3, "f": f})
-
-df = pd.DataFrame(rows)
+    return (TRUTH >> ((x1 << 2) | (x2 << 1) | x3)) & 1
+
+# Generate all combinations in one shot (rows in x1, x2, x3 lexicographic order)
+X = np.array(np.meshgrid([0, 1], [0, 1], [0, 1], indexing="ij")).reshape(3, -1).T
+f = ((TRUTH >> ((X[:, 0] << 2) | (X[:, 1] << 1) | X[:, 2])) & 1).astype(np.int8)
+
+df = pd.DataFrame({"x1": X[:, 0], "x2": X[:, 1], "x3": X[:, 2], "f": f})
 print("Truth Table for Custom Function f(x1,x2,x3):")
 print(df.to_string(index=False))
 print()
@@ -60,7 +69,9 @@ print("=" * 70)
 
 # Build with trie method
 cfg_trie = BuildConfig(ordering="fixed", compilation_method="trie", enable_reduction=True)
+t0 = time.perf_counter()
 mdd_trie = Builder(schema, cfg_trie).fit(df, order=["x1", "x2", "x3", "f"])
+trie_seconds = time.perf_counter() - t0
 
 print(f"MDD Statistics: {mdd_trie.size()}")
 print(f"Dimension order: {mdd_trie.dim_names}")
@@ -69,11 +80,7 @@ print()
 # Show the structure
 print("MDD Node Structure:")
 print("-" * 70)
-for i, node in enumerate(mdd_trie.nodes):
-    layer_name = mdd_trie.dim_names[node.layer] if node.layer < len(mdd_trie.dim_names) else "Terminal"
-    edges_str = ", ".join(f"{k}->{v}" for k, v in sorted(node.edges.items()))
-    term_info = f" [TERMINAL: {node.terminal_count} paths]" if node.terminal_count > 0 else ""
-    print(f"Node {i} (layer {node.layer}: {layer_name}): edges=[{edges_str}]{term_info}")
+dump_nodes(mdd_trie, "bdd_nodes_trie.txt")
 
 print()
 print("=" * 70)
@@ -82,7 +89,9 @@ print("=" * 70)
 
 # Build with slice method
 cfg_slice = BuildConfig(ordering="fixed", compilation_method="slice")
+t0 = time.perf_counter()
 mdd_slice = Builder(schema, cfg_slice).fit(df, order=["x1", "x2", "x3", "f"])
+slice_seconds = time.perf_counter() - t0
 
 print(f"MDD Statistics: {mdd_slice.size()}")
 print(f"Dimension order: {mdd_slice.dim_names}")
@@ -91,11 +100,7 @@ print()
 # Show the structure
 print("MDD Node Structure:")
 print("-" * 70)
-for i, node in enumerate(mdd_slice.nodes):
-    layer_name = mdd_slice.dim_names[node.layer] if node.layer < len(mdd_slice.dim_names) else "Terminal"
-    edges_str = ", ".join(f"{k}->{v}" for k, v in sorted(node.edges.items()))
-    term_info = f" [TERMINAL: {node.terminal_count} paths]" if node.terminal_count > 0 else ""
-    print(f"Node {i} (layer {node.layer}: {layer_name}): edges=[{edges_str}]{term_info}")
+dump_nodes(mdd_slice, "bdd_nodes_slice.txt")
 
 print()
 print("=" * 70)
@@ -103,8 +108,10 @@ print("COMPARISON")
 print("=" * 70)
 trie_size = mdd_trie.size()
 slice_size = mdd_slice.size()
-print(f"Trie method:  {trie_size['nodes']} nodes, {trie_size['arcs']} arcs")
-print(f"Slice method: {slice_size['nodes']} nodes, {slice_size['arcs']} arcs")
+print(f"Trie method:  {trie_size['nodes']} nodes, {trie_size['arcs']} arcs "
+      f"(built in {trie_seconds * 1000:.2f} ms)")
+print(f"Slice method: {slice_size['nodes']} nodes, {slice_size['arcs']} arcs "
+      f"(built in {slice_seconds * 1000:.2f} ms)")
 print(f"Match: {'YES ✓' if trie_size == slice_size else 'NO ✗'}")
 
 # Verify queries work identically
@@ -126,7 +133,7 @@ for tc in test_cases:
     f_trie = [m['f'] for m in matches_trie]
     f_slice = [m['f'] for m in matches_slice]
     match_symbol = "✓" if f_trie == f_slice else "✗"
-    print(f"Input: {tc}")
+    print(f"Input: {tc} (expected f={custom_function(tc['x1'], tc['x2'], tc['x3'])})")
     print(f"  Trie:  f={f_trie}  |  Slice: f={f_slice}  [{match_symbol}]")
 
 print()
@@ -0,0 +1,37 @@
+"""
+Shared loader for the Lanes example scripts.
+
+Parsing the xlsx workbook is by far the slowest step of those scripts, so the
+parsed sheet is cached in a Parquet sidecar next to the workbook and reused
+until the workbook changes.
+"""
+
+import os
+
+import pandas as pd
+
+
+def load_sheet(xlsx, sheet, columns=None):
+    """Load one sheet of `xlsx`, via the `{xlsx}.{sheet}.parquet` cache when it is fresh.
+
+    The whole sheet is cached, so scripts selecting different columns share it;
+    `columns` only limits what is returned (Parquet reads just those columns).
+    If the sheet cannot be written as Parquet (no pyarrow, or mixed-type columns
+    pyarrow rejects), it is returned uncached.
+    """
+    cache = f"{xlsx}.{sheet}.parquet"
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(xlsx):
+        print(f"Using cached sheet: {cache}")
+        return pd.read_parquet(cache, columns=columns)
+
+    df = pd.read_excel(xlsx, sheet_name=sheet)
+    try:
+        df.to_parquet(cache, compression="zstd")
+    except ImportError:
+        print("Install pyarrow to cache the parsed sheet as Parquet.")
+    except (ValueError, TypeError) as e:
+        # e.g. pyarrow's ArrowInvalid/ArrowTypeError on object columns mixing ints and strings
+        print(f"Not caching the sheet as Parquet: {e}")
+        if os.path.exists(cache):
+            os.remove(cache)
+    return df[columns] if columns is not None else df
@@ -10,9 +10,11 @@ Usage:
     python examples/lanes_mdd_example.py trie      # Explicit trie method
 """
 
-import pandas as pd
+import numpy as np
 import sys
+from functools import lru_cache
 from mdd4tables import Schema, DimensionSpec, DimensionType, BuildConfig, Builder
+from lanes_io import load_sheet
 
 # Configuration
 EXCEL_FILE = "examples/ib_weekly_splits_20250807-091113.xlsx"
@@ -50,8 +52,10 @@ print()
 
 # Read data
 print("Reading Excel file...")
-df = pd.read_excel(EXCEL_FILE, sheet_name=SHEET_NAME)
-print(f"Loaded {len(df):,} rows with {len(df.columns)} columns")
+# The parsed sheet is cached as Parquet next to the workbook (see lanes_io.py);
+# categoricals keep the selected columns compact and fast to nunique/sample
+df_selected = load_sheet(EXCEL_FILE, SHEET_NAME, columns=SELECTED_COLUMNS).astype("category")
+print(f"Loaded {len(df_selected):,} rows with {len(df_selected.columns)} columns")
 print()
 
 # Select columns and handle missing values
@@ -60,15 +64,16 @@ for col in SELECTED_COLUMNS:
     print(f"  - {col}")
 print()
 
-df_selected = df[SELECTED_COLUMNS].copy()
-
 # Show data statistics before cleaning
 print("Data Quality Check:")
 print("-" * 70)
+# One call each over all columns instead of a nunique/isna pass per column
+total = len(df_selected)
+nunique = df_selected[SELECTED_COLUMNS].nunique()
+missing_counts = df_selected[SELECTED_COLUMNS].isna().sum()
 for col in SELECTED_COLUMNS:
-    total = len(df_selected)
-    missing = df_selected[col].isna().sum()
-    unique = df_selected[col].nunique()
+    unique = nunique[col]
+    missing = missing_counts[col]
     pct_missing = (missing / total) * 100
     print(f"{col:30s}: {unique:5d} unique, {missing:5d} missing ({pct_missing:5.1f}%)")
 print()
@@ -87,14 +92,17 @@ print()
 MAX_ROWS = 1000
 if len(df_clean) > MAX_ROWS:
     print(f"Dataset is large ({len(df_clean):,} rows). Taking a sample of {MAX_ROWS:,} rows for demo.")
-    df_clean = df_clean.sample(n=MAX_ROWS, random_state=42)
+    # Draw row positions directly rather than permuting the whole frame
+    idx = np.random.default_rng(42).choice(len(df_clean), MAX_ROWS, replace=False, shuffle=False)
+    df_clean = df_clean.iloc[idx]
     print()
 
 # Show unique value counts after cleaning
 print("Dimension Cardinality (after cleaning):")
 print("-" * 70)
+nunique = df_clean[SELECTED_COLUMNS].nunique()
 for col in SELECTED_COLUMNS:
-    unique = df_clean[col].nunique()
+    unique = nunique[col]
     print(f"{col:30s}: {unique:5d} unique values")
 print()
 
@@ -123,6 +131,23 @@ else:
 
 mdd = Builder(schema, cfg).fit(df_clean)
 
+# Memoized query helpers. Query dicts are keyed by their sorted (dim, value)
+# items; call _clear_query_cache() if `mdd` is rebuilt.
+@lru_cache(maxsize=4096)
+def _match(items, limit):
+    return mdd.match(dict(items), limit=limit)
+
+@lru_cache(maxsize=4096)
+def _complete(items, k):
+    return mdd.complete(dict(items), k=k)
+
+def _key(query):
+    return tuple(sorted(query.items()))
+
+def _clear_query_cache():
+    for fn in (_match, _complete):
+        fn.cache_clear()
+
 # Show results
 print(f"\nMDD Statistics:")
 print("-" * 70)
@@ -132,9 +157,14 @@ print(f"Arcs:   {size['arcs']:,}")
 print(f"Layers: {size['layers']}")
 print()
 
+# Node count per layer, computed in a single pass over the nodes
+layer_node_counts = {}
+for n in mdd.nodes:
+    layer_node_counts[n.layer] = layer_node_counts.get(n.layer, 0) + 1
+
 print("Dimension order chosen by heuristic:")
 for i, dim in enumerate(mdd.dim_names):
-    node_count = sum(1 for n in mdd.nodes if n.layer == i)
+    node_count = layer_node_counts.get(i, 0)
     print(f"  Layer {i}: {dim:30s} ({node_count} nodes)")
 print()
 
@@ -155,15 +185,14 @@ print("=" * 70)
 # Query 1: Count paths by LOB
 print("\n1. Count of shipping lanes by Line of Business (LOB):")
 print("-" * 70)
-for lob in sorted(df_clean['LOB'].unique()):
-    count = mdd.count({"LOB": lob})
+for lob, count in sorted(mdd.counts_by("LOB").items()):
     print(f"  {lob:15s}: {count:5d} lanes")
 
 # Query 2: Find lanes for specific criteria
 print("\n2. Find lanes for IPHONE in APAC with AIR mode:")
 print("-" * 70)
 query = {"LOB": "IPHONE", "GEO": "APAC", "MODE_TYPE": "AIR"}
-matches = mdd.match(query, limit=10)
+matches = _match(_key(query), 10)
 if matches:
     print(f"Found {len(matches)} matching lanes (showing first 10):")
     for i, path in enumerate(matches[:10], 1):
@@ -173,7 +202,7 @@ if matches:
 else:
     print("No matches found. Trying just LOB and GEO...")
     query2 = {"LOB": "IPHONE", "GEO": "APAC"}
-    matches2 = mdd.match(query2, limit=5)
+    matches2 = _match(_key(query2), 5)
     if matches2:
         print(f"Found {len(matches2)} matches for {query2}:")
         for i, path in enumerate(matches2[:5], 1):
@@ -185,7 +214,7 @@ else:
 print("\n3. Top-5 most likely completions for LOB=ACCY, GEO=EURO:")
 print("-" * 70)
 partial = {"LOB": "ACCY", "GEO": "EURO"}
-completions = mdd.complete(partial, k=5)
+completions = _complete(_key(partial), 5)
 if completions:
     for i, result in enumerate(completions, 1):
         print(f"\n  Completion {i} (score: {result.score:.3f}):")
@@ -212,8 +241,13 @@ print("VISUALIZATION")
 print("=" * 70)
 
 try:
+    # Figures are only saved to disk, so skip interactive backend discovery
+    import matplotlib
+    matplotlib.use('Agg')
     import matplotlib.pyplot as plt
     import matplotlib.patches as mpatches
+    from matplotlib.collections import PatchCollection
+    from matplotlib.colors import to_rgba
 
     def draw_mdd(mdd, title="Multi-Valued Decision Diagram", save_path=None, max_nodes=200):
         """Draw MDD with hierarchical layout."""
@@ -231,73 +265,75 @@ try:
         for i, n in enumerate(mdd.nodes):
             layers.setdefault(n.layer, []).append(i)
 
-        # Calculate positions - top to bottom layout
-        pos = {}
-        layer_widths = {layer: len(nodes) for layer, nodes in layers.items()}
-        max_width = max(layer_widths.values())
+        # Calculate positions - top to bottom layout, one (x, y) row per node id
+        layer_node_counts = {layer: len(nodes) for layer, nodes in layers.items()}
+        max_width = max(layer_node_counts.values())
 
+        pos = np.empty((len(mdd.nodes), 2))
         for layer, nodes in layers.items():
-            width = len(nodes)
-            for j, node_id in enumerate(nodes):
-                # Center nodes horizontally within each layer
-                x = (j - (width - 1) / 2) * 2.0
-                y = -layer * 2.5  # Top to bottom
-                pos[node_id] = (x, y)
-
-        # Draw edges first (so they're behind nodes)
-        for node_id, (x, y) in pos.items():
-            node = mdd.nodes[node_id]
-            for label, child_id in node.edges.items():
-                cx, cy = pos[child_id]
-
-                # Color edges by count if available
-                count = node.edge_counts.get(label, 0)
-                # Normalize alpha by count (higher count = more opaque)
-                max_count = max(node.edge_counts.values()) if node.edge_counts else 1
-                alpha = 0.3 + 0.7 * (count / max_count) if max_count > 0 else 0.5
-
-                # Draw edge
-                ax.annotate("", xy=(cx, cy + 0.3), xytext=(x, y - 0.3),
-                           arrowprops=dict(arrowstyle='->', color='gray',
-                                          alpha=alpha, lw=1.5))
-
-                # Edge label (show only if not too many edges)
-                if len(node.edges) <= 5:
-                    mid_x, mid_y = (x + cx) / 2, (y + cy) / 2
-                    label_str = str(label)[:15] + "..." if len(str(label)) > 15 else str(label)
-                    ax.text(mid_x + 0.2, mid_y, label_str, fontsize=7,
-                           color='gray', ha='left', va='center', alpha=0.7)
-
-        # Draw nodes
-        for node_id, (x, y) in pos.items():
-            node = mdd.nodes[node_id]
-
-            if node.terminal_count > 0:
-                # Terminal nodes - rounded squares
-                rect = mpatches.FancyBboxPatch((x - 0.25, y - 0.25), 0.5, 0.5,
-                                               boxstyle="round,pad=0.05",
-                                               facecolor='#27ae60', edgecolor='#229954',
-                                               linewidth=2)
-                ax.add_patch(rect)
-                # Show terminal count
-                ax.text(x, y, f"✓\n{node.terminal_count}", fontsize=8,
-                       fontweight='bold', ha='center', va='center', color='white')
-            else:
-                # Decision nodes - circles
-                layer_name = mdd.dim_names[node.layer] if node.layer < len(mdd.dim_names) else "?"
-                # Color by layer
-                colors = ['#3498db', '#9b59b6', '#e74c3c', '#f39c12', '#1abc9c', '#34495e', '#e67e22']
-                color = colors[node.layer % len(colors)]
-                edge_color = '#2c3e50'
-
-                circle = plt.Circle((x, y), 0.35, facecolor=color,
-                                    edgecolor=edge_color, linewidth=2)
-                ax.add_patch(circle)
-
-                # Node label - show layer name and node ID
-                label_text = layer_name[:10]  # Truncate long names
-                ax.text(x, y, f"{label_text}\n#{node_id}", fontsize=8, fontweight='bold',
-                       ha='center', va='center', color='white')
+            ids = np.asarray(nodes)
+            # Center nodes horizontally within each layer, top to bottom
+            pos[ids, 0] = (np.arange(len(ids)) - (len(ids) - 1) / 2) * 2.0
+            pos[ids, 1] = -layer * 2.5
+
+        # Flatten arcs into parallel arrays (grouped by source node)
+        src, dst, counts, labels = mdd.edge_counts_array()
+        fanout = np.bincount(src, minlength=len(mdd.nodes))[src]
+        node_max = np.zeros(len(mdd.nodes), dtype=np.int32)
+        np.maximum.at(node_max, src, counts)
+        node_max = node_max[src]
+
+        # Normalize alpha by count relative to the busiest sibling arc (higher = more opaque)
+        alphas = np.where(node_max > 0, 0.3 + 0.7 * counts / np.maximum(node_max, 1), 0.5)
+        mids = (pos[src] + pos[dst]) / 2
+
+        # Draw edges first (so they're behind nodes): all arrows in a single
+        # quiver collection instead of one annotate artist per arc
+        if len(src):
+            starts = pos[src] - (0, 0.3)
+            ends = pos[dst] + (0, 0.3)
+            rgba = np.tile(to_rgba('gray'), (len(src), 1))
+            rgba[:, 3] = alphas
+            ax.quiver(starts[:, 0], starts[:, 1],
+                      ends[:, 0] - starts[:, 0], ends[:, 1] - starts[:, 1],
+                      angles='xy', scale_units='xy', scale=1, color=rgba,
+                      width=0.002, headwidth=4, headlength=5, zorder=1)
+
+        # Edge labels (show only if not too many edges)
+        for e in np.flatnonzero(fanout <= 5):
+            label = str(labels[e])
+            label_str = label[:15] + "..." if len(label) > 15 else label
+            ax.text(mids[e, 0] + 0.2, mids[e, 1], label_str, fontsize=7,
+                   color='gray', ha='left', va='center', alpha=0.7)
+
+        # Draw nodes: one PatchCollection per node style instead of one patch artist per node
+        term_ids = np.flatnonzero([n.terminal_count > 0 for n in mdd.nodes])
+        decision_ids = np.setdiff1d(np.arange(len(mdd.nodes)), term_ids)
+        # Color decision nodes by layer
+        colors = ['#3498db', '#9b59b6', '#e74c3c', '#f39c12', '#1abc9c', '#34495e', '#e67e22']
+        ax.add_collection(PatchCollection(
+            [plt.Circle(pos[i], 0.35) for i in decision_ids],
+            facecolors=[colors[mdd.nodes[i].layer % len(colors)] for i in decision_ids],
+            edgecolors='#2c3e50', linewidths=2, zorder=2))
+        # Terminal nodes - rounded squares
+        ax.add_collection(PatchCollection(
+            [mpatches.FancyBboxPatch(pos[i] - 0.25, 0.5, 0.5, boxstyle="round,pad=0.05")
+             for i in term_ids],
+            facecolors='#27ae60', edgecolors='#229954', linewidths=2, zorder=2))
+
+        for node_id in term_ids:
+            x, y = pos[node_id]
+            # Show terminal count
+            ax.text(x, y, f"✓\n{mdd.nodes[node_id].terminal_count}", fontsize=8,
+                   fontweight='bold', ha='center', va='center', color='white')
+        for node_id in decision_ids:
+            x, y = pos[node_id]
+            layer = mdd.nodes[node_id].layer
+            layer_name = mdd.dim_names[layer] if layer < len(mdd.dim_names) else "?"
+            # Node label - show layer name and node ID
+            label_text = layer_name[:10]  # Truncate long names
+            ax.text(x, y, f"{label_text}\n#{node_id}", fontsize=8, fontweight='bold',
+                   ha='center', va='center', color='white')
 
         # Add legend
         legend_elements = [
@@ -316,7 +352,7 @@ try:
         # Add layer labels on the side
         for layer in range(len(mdd.dim_names)):
             layer_name = mdd.dim_names[layer]
-            node_count = sum(1 for n in mdd.nodes if n.layer == layer)
+            node_count = layer_node_counts.get(layer, 0)
             ax.text(-max_width * 1.1, -layer * 2.5,
                    f"Layer {layer}: {layer_name}\n({node_count} nodes)",
                    fontsize=9, va='center', ha='left',
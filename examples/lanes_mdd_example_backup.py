@@ -10,9 +10,10 @@ Usage:
     python examples/lanes_mdd_example.py trie      # Explicit trie method
 """
 
-import pandas as pd
+import numpy as np
 import sys
 from mdd4tables import Schema, DimensionSpec, DimensionType, BuildConfig, Builder
+from lanes_io import load_sheet
 
 # Configuration
 EXCEL_FILE = "examples/ib_weekly_splits_20250807-091113.xlsx"
@@ -48,7 +49,7 @@ print()
 
 # Read data
 print("Reading Excel file...")
-df = pd.read_excel(EXCEL_FILE, sheet_name=SHEET_NAME)
+df = load_sheet(EXCEL_FILE, SHEET_NAME)
 print(f"Loaded {len(df):,} rows with {len(df.columns)} columns")
 print()
 
@@ -63,10 +64,13 @@ df_selected = df[SELECTED_COLUMNS].copy()
 # Show data statistics before cleaning
 print("Data Quality Check:")
 print("-" * 70)
+# One call each over all columns instead of a nunique/isna pass per column
+total = len(df_selected)
+nunique = df_selected[SELECTED_COLUMNS].nunique()
+missing_counts = df_selected[SELECTED_COLUMNS].isna().sum()
 for col in SELECTED_COLUMNS:
-    total = len(df_selected)
-    missing = df_selected[col].isna().sum()
-    unique = df_selected[col].nunique()
+    unique = nunique[col]
+    missing = missing_counts[col]
     pct_missing = (missing / total) * 100
     print(f"{col:30s}: {unique:5d} unique, {missing:5d} missing ({pct_missing:5.1f}%)")
 print()
@@ -85,14 +89,17 @@ print()
 MAX_ROWS = 1000
 if len(df_clean) > MAX_ROWS:
     print(f"Dataset is large ({len(df_clean):,} rows). Taking a sample of {MAX_ROWS:,} rows for demo.")
-    df_clean = df_clean.sample(n=MAX_ROWS, random_state=42)
+    # Draw row positions directly rather than permuting the whole frame
+    idx = np.random.default_rng(42).choice(len(df_clean), MAX_ROWS, replace=False, shuffle=False)
+    df_clean = df_clean.iloc[idx]
     print()
 
 # Show unique value counts after cleaning
 print("Dimension Cardinality (after cleaning):")
 print("-" * 70)
+nunique = df_clean[SELECTED_COLUMNS].nunique()
 for col in SELECTED_COLUMNS:
-    unique = df_clean[col].nunique()
+    unique = nunique[col]
     print(f"{col:30s}: {unique:5d} unique values")
 print()
 
@@ -130,9 +137,14 @@ print(f"Arcs:   {size['arcs']:,}")
 print(f"Layers: {size['layers']}")
 print()
 
+# Node count per layer, computed in a single pass over the nodes
+layer_node_counts = {}
+for n in mdd.nodes:
+    layer_node_counts[n.layer] = layer_node_counts.get(n.layer, 0) + 1
+
 print("Dimension order chosen by heuristic:")
 for i, dim in enumerate(mdd.dim_names):
-    node_count = sum(1 for n in mdd.nodes if n.layer == i)
+    node_count = layer_node_counts.get(i, 0)
     print(f"  Layer {i}: {dim:30s} ({node_count} nodes)")
 print()
 
@@ -153,8 +165,7 @@ print("=" * 70)
 # Query 1: Count paths by LOB
 print("\n1. Count of shipping lanes by Line of Business (LOB):")
 print("-" * 70)
-for lob in sorted(df_clean['LOB'].unique()):
-    count = mdd.count({"LOB": lob})
+for lob, count in sorted(mdd.counts_by("LOB").items()):
     print(f"  {lob:15s}: {count:5d} lanes")
 
 # Query 2: Find lanes for specific criteria
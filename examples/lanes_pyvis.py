@@ -8,8 +8,8 @@ This creates a beautiful interactive network visualization with:
 - Hierarchical layout
 """
 
-import pandas as pd
 from mdd4tables import Schema, DimensionSpec, DimensionType, BuildConfig, Builder
+from lanes_io import load_sheet
 from mdd4tables.viz_advanced import visualize_mdd
 
 # Configuration
@@ -37,7 +37,7 @@ print()
 
 # Read data
 print("Reading Excel file...")
-df = pd.read_excel(EXCEL_FILE, sheet_name=SHEET_NAME)
+df = load_sheet(EXCEL_FILE, SHEET_NAME)
 print(f"Loaded {len(df):,} rows")
 
 # Select and clean data
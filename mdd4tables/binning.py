@@ -1,5 +1,5 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional
 import numpy as np
 import pandas as pd
@@ -13,18 +13,68 @@ class BinModel:
     strategy: str
     k: int
     missing_token: Any = DEFAULT_MISSING_TOKEN
+    # interval label per bin, built once from edges
+    _labels: np.ndarray = field(init=False, repr=False, compare=False)
+    # categories of transform()'s output (distinct labels, then the missing token) and the
+    # category code of each bin; the last code is the missing token
+    _categories: List[Any] = field(init=False, repr=False, compare=False)
+    _bin_codes: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        n_bins = len(self.edges) - 1
+        labels = [
+            # right-inclusive last bin
+            f"[{lo:.6g},{hi:.6g})" if i < n_bins - 1 else f"[{lo:.6g},{hi:.6g}]"
+            for i, (lo, hi) in enumerate(zip(self.edges[:-1], self.edges[1:]))
+        ]
+        self._labels = np.array(labels, dtype=object)
+        # edges closer than the label precision render alike, so bins may share a label
+        codes, uniques = pd.factorize(self._labels)
+        self._categories = uniques.tolist()
+        if self.missing_token in self._categories:
+            self._bin_codes = np.append(codes, self._categories.index(self.missing_token))
+        else:
+            self._bin_codes = np.append(codes, len(self._categories))
+            self._categories.append(self.missing_token)
+
+    def _bin_index(self, x: np.ndarray) -> np.ndarray:
+        idx = np.searchsorted(self.edges, x, side="right") - 1
+        return np.clip(idx, 0, len(self.edges)-2)
 
     def transform_one(self, x: Any) -> str:
         if x is None or (isinstance(x, float) and np.isnan(x)):
             return self.missing_token
-        # right-inclusive last bin
-        idx = np.searchsorted(self.edges, x, side="right") - 1
-        idx = int(np.clip(idx, 0, len(self.edges)-2))
-        lo, hi = self.edges[idx], self.edges[idx+1]
-        return f"[{lo:.6g},{hi:.6g})" if idx < len(self.edges)-2 else f"[{lo:.6g},{hi:.6g}]"
+        return self._labels[int(self._bin_index(x))]
 
     def transform(self, s: pd.Series) -> pd.Series:
-        return s.apply(self.transform_one)
+        """Bin labels of `s` (missing token for NaN), as a categorical Series.
+
+        Searching the interior edges gives the clipped bin index directly; NaN sorts
+        past every edge and is then routed to the missing token's code. The result
+        carries codes rather than a per-row label array, which is what both building
+        it and factorizing it downstream are dominated by.
+        """
+        x = s.to_numpy(dtype=float)
+        idx = np.searchsorted(self.edges[1:-1], x, side="right")
+        idx[np.isnan(x)] = len(self.edges) - 1
+        cat = pd.Categorical.from_codes(self._bin_codes[idx], categories=self._categories)
+        return pd.Series(cat, index=s.index, name=s.name)
+
+def _quantiles(x: np.ndarray, k: int) -> np.ndarray:
+    """The k+1 evenly spaced quantiles of x, equal to np.quantile(x, np.linspace(0, 1, k+1)).
+
+    Only k+1 order statistics are needed, so they are read off one sorted copy of x
+    and interpolated like np.quantile's default (linear) method, which skips its
+    generic per-quantile partition work.
+    """
+    s = np.sort(x).astype(float, copy=False)
+    h = np.linspace(0, 1, k+1) * (len(s) - 1)
+    lo = np.floor(h).astype(np.intp)
+    hi = np.minimum(lo + 1, len(s) - 1)
+    t = h - lo
+    a, b = s[lo], s[hi]
+    # same lerp as np.quantile, from the nearer end for numerical stability
+    return np.where(t >= 0.5, b - (b - a) * (1 - t), a + (b - a) * t)
 
 def fit_binner(values: pd.Series, bins_cfg: Dict[str, Any],
                missing_token: Any = DEFAULT_MISSING_TOKEN) -> BinModel:
@@ -44,8 +94,7 @@ def fit_binner(values: pd.Series, bins_cfg: Dict[str, Any],
         else:
             edges = np.linspace(lo, hi, k+1)
     elif strat == "quantile":
-        qs = np.linspace(0, 1, k+1)
-        edges = np.quantile(x, qs)
+        edges = _quantiles(x, k)
         # ensure strictly increasing
         edges = np.unique(edges)
         if len(edges) < 2:
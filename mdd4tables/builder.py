@@ -1,93 +1,174 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
 
-from .schema import Schema, DimensionType
+from .schema import Schema, DimensionSpec, DimensionType
 from .config import BuildConfig
 from .binning import fit_binner, BinModel
 from .mdd import MDD, Node
-from .slice_compile import SliceCompiler
+from .slice_compile import SliceCompiler, factorize_columns
+
+@dataclass
+class LayerArrays:
+    """Arcs leaving one layer of the trie, as parallel int32 arrays.
+
+    Arcs are grouped by parent (a node index within this layer): the arcs of
+    parent p are ``parent_ptr[p]:parent_ptr[p+1]``. ``child`` indexes nodes of
+    the next layer and ``label_code`` indexes ``labels``.
+    """
+    labels: List[Any]
+    parent_ptr: np.ndarray
+    parent: np.ndarray
+    label_code: np.ndarray
+    child: np.ndarray
+    count: np.ndarray
 
 @dataclass
 class Builder:
     schema: Schema
-    config: BuildConfig = BuildConfig()
+    config: BuildConfig = field(default_factory=BuildConfig)
+    # (search settings, schema, data fingerprint) -> searched order, reused across fit() calls
+    _order_cache: Dict[Tuple, List[str]] = field(default_factory=dict, init=False, repr=False,
+                                                 compare=False)
 
     def fit(self, df: pd.DataFrame, order: Optional[List[str]] = None) -> MDD:
         self.schema.validate(df.columns)
+        cfg = self.config
 
         # decide ordering
         dim_names = order or self.schema.names()
-        if self.config.ordering != "fixed" and order is None:
+        if cfg.ordering != "fixed" and order is None:
             from .ordering import propose_order, search_order
-            if self.config.ordering == "search":
-                dim_names = search_order(df, self.schema, self.config.ordering_config).order
+            if cfg.ordering == "search":
+                # only the search is worth a pass hashing the data for the cache key
+                key = self._order_key(df)
+                if key not in self._order_cache:
+                    self._order_cache[key] = search_order(df, self.schema,
+                                                          cfg.ordering_config).order
+                dim_names = list(self._order_cache[key])
             else:
-                dim_names = propose_order(df, self.schema, self.config.ordering_config).order
+                dim_names = propose_order(df, self.schema, cfg.ordering_config).order
 
         schema = self.schema.subset(dim_names)
 
         # fit bin models for numeric dims
         bin_models: Dict[str, BinModel] = {}
-        working = df.copy()
+        # only the transformed dimension columns are materialized, never a copy of df
+        working: Dict[str, pd.Series] = {}
+
+        def bin_dim(d: DimensionSpec) -> Tuple[BinModel, pd.Series]:
+            bins_cfg = d.bins or cfg.default_numeric_bins or {"strategy":"quantile","k":10}
+            x = df[d.name].astype(float)
+            b = fit_binner(x, bins_cfg, missing_token=d.missing_token)
+            return b, b.transform(x)
+
+        numeric = [d for d in schema.dims if d.dtype == DimensionType.NUMERIC]
+        if cfg.binning_workers > 1 and len(numeric) > 1:
+            # binning is NumPy sort/searchsorted work that releases the GIL
+            with ThreadPoolExecutor(max_workers=min(cfg.binning_workers, len(numeric))) as ex:
+                binned = list(ex.map(bin_dim, numeric))
+        else:
+            binned = [bin_dim(d) for d in numeric]
+        for d, (b, col) in zip(numeric, binned):
+            bin_models[d.name] = b
+            working[d.name] = col
+
         for d in schema.dims:
-            if d.dtype == DimensionType.NUMERIC:
-                bins_cfg = d.bins or self.config.default_numeric_bins or {"strategy":"quantile","k":10}
-                b = fit_binner(working[d.name].astype(float), bins_cfg,
-                               missing_token=d.missing_token)
-                bin_models[d.name] = b
-                working[d.name] = b.transform(working[d.name].astype(float))
-            else:
-                # normalize missing
-                working[d.name] = working[d.name].where(~working[d.name].isna(), other=d.missing_token)
+            if d.dtype != DimensionType.NUMERIC:
+                # normalize missing (categorical dtypes must know the token as a category);
+                # clean columns are used as-is
+                col = df[d.name]
+                missing = col.isna()
+                if missing.any():
+                    if isinstance(col.dtype, pd.CategoricalDtype) and d.missing_token not in col.cat.categories:
+                        col = col.cat.add_categories([d.missing_token])
+                    col = col.where(~missing, other=d.missing_token)
+                working[d.name] = col
+
+        # Both compilers work on int32 codes; labels are decoded only on the final nodes
+        codes, labels = factorize_columns(working, dim_names, len(df))
 
         # Choose compilation method
-        if self.config.compilation_method == "slice":
+        if cfg.compilation_method == "slice":
             # Slice-based incremental compilation (Nicholson-Bridge-Wilson 2006)
             compiler = SliceCompiler(schema=schema, dim_names=dim_names)
-            nodes, root, terminal_layer = compiler.compile(working)
+            nodes, root, terminal_layer = compiler.compile_codes(codes, labels)
         else:
             # Traditional trie construction followed by optional reduction
-            nodes, root, terminal_layer = self._build_trie(working, dim_names)
-            if self.config.enable_reduction:
-                nodes, root = self._reduce(nodes, terminal_layer)
+            layers = self._build_trie(codes, labels)
+            reach = self._reach_counts(layers, len(df))
+            terminal = reach[-1]
+            if cfg.enable_reduction:
+                layers, reach, terminal = self._reduce(layers, reach)
+            nodes = self._to_nodes(layers, reach, terminal)
+            root, terminal_layer = 0, len(dim_names)
 
+        # bitsets count rows, which only the trie's counts agree with (see BuildConfig)
+        bitsets = None
+        if cfg.row_bitsets and cfg.compilation_method != "slice":
+            bitsets = _row_bitsets(codes, labels, dim_names)
         return MDD(dim_names=dim_names, nodes=nodes, root=root, terminal_layer=terminal_layer,
-                   laplace_alpha=self.config.laplace_alpha, bin_models=bin_models)
+                   laplace_alpha=cfg.laplace_alpha, bin_models=bin_models, row_bitsets=bitsets)
 
-    def _build_trie(self, working: pd.DataFrame, dim_names: List[str]) -> Tuple[List[Node], int, int]:
-        """Build an uncompressed trie from the data.
+    def _order_key(self, df: pd.DataFrame) -> Tuple:
+        """Cache key for the dimension ordering of `df` under the current config.
 
-        Returns:
-            (nodes, root, terminal_layer)
+        The data part is the row count plus a content hash of each dimension column.
         """
-        nodes: List[Node] = []
-        root = 0
-        nodes.append(Node(layer=0, edges={}, edge_counts={}, reach_count=0, terminal_count=0))
-
-        # insert each row as a path (using itertuples for performance)
-        for row in working[dim_names].itertuples(index=False, name=None):
-            nid = root
-            nodes[nid].reach_count += 1
-            for layer, v in enumerate(row):
-                n = nodes[nid]
-                if v in n.edges:
-                    child = n.edges[v]
-                    n.edge_counts[v] = n.edge_counts.get(v, 0) + 1
-                else:
-                    child = len(nodes)
-                    n.edges[v] = child
-                    n.edge_counts[v] = n.edge_counts.get(v, 0) + 1
-                    nodes.append(Node(layer=layer+1, edges={}, edge_counts={}, reach_count=0, terminal_count=0))
-                nid = child
-                nodes[nid].reach_count += 1
-            nodes[nid].terminal_count += 1
-
-        terminal_layer = len(dim_names)
-        return nodes, root, terminal_layer
-
-    def _reduce(self, nodes: List[Node], terminal_layer: int) -> Tuple[List[Node], int]:
+        cfg = self.config
+        names = self.schema.names()
+        schema_key = tuple((d.name, d.dtype) for d in self.schema.dims)
+        data_key = tuple(int(pd.util.hash_pandas_object(df[n], index=False).sum()) for n in names)
+        return (cfg.ordering, cfg.ordering_config, schema_key, len(df), data_key)
+
+    def _build_trie(self, codes: np.ndarray, labels: List[List[Any]]) -> List[LayerArrays]:
+        """Build an uncompressed trie from factorized rows, as one LayerArrays per dimension.
+
+        Rather than inserting rows one at a time, the trie is grown one layer at a
+        time: the children of layer L are the distinct (parent, label code) pairs
+        among the rows at layer L. Nodes within a layer (and labels within a node)
+        keep the order of the first row that reaches them, i.e. the same order
+        row-by-row insertion produces.
+        """
+        layers: List[LayerArrays] = []
+        # per row: index of its current node within the current layer
+        row_node = np.zeros(len(codes), dtype=np.int64)
+        n_parents = 1
+        for layer, layer_labels in enumerate(labels):
+            card = max(len(layer_labels), 1)
+            # one key per distinct (parent, label) pair; factorize numbers them by first row
+            row_child, pairs = pd.factorize(row_node * card + codes[:, layer])
+            count = np.bincount(row_child, minlength=len(pairs))
+            parent = pairs // card
+            # group arcs by parent; the stable sort keeps each parent's labels in first-seen order
+            arc_order = np.argsort(parent, kind="stable")
+            layers.append(LayerArrays(
+                labels=layer_labels,
+                parent_ptr=_offsets(parent, n_parents),
+                parent=parent[arc_order].astype(np.int32),
+                label_code=(pairs % card)[arc_order].astype(np.int32),
+                child=arc_order.astype(np.int32),
+                count=count[arc_order].astype(np.int32),
+            ))
+            row_node = row_child.astype(np.int64, copy=False)
+            n_parents = len(pairs)
+        return layers
+
+    @staticmethod
+    def _reach_counts(layers: List[LayerArrays], n_rows: int) -> List[np.ndarray]:
+        """Number of rows reaching each node, per layer (layer 0 is the root)."""
+        reach = [np.array([n_rows], dtype=np.int64)]
+        for la in layers:
+            r = np.zeros(len(la.child), dtype=np.int64)
+            r[la.child] = la.count
+            reach.append(r)
+        return reach
+
+    def _reduce(self, layers: List[LayerArrays], reach: List[np.ndarray]
+                ) -> Tuple[List[LayerArrays], List[np.ndarray], np.ndarray]:
         """Bottom-up reduction by merging equivalent nodes within same layer.
 
         Nodes are considered equivalent if they have identical structure:
@@ -95,81 +176,110 @@ class Builder:
         - Same outgoing edges (label -> child mapping after remapping)
         - Same terminal_count (for terminal nodes)
 
+        A node's signature is the bytes of its (label code, remapped child) int32
+        pairs in label-code order, so no Python-level sorting is needed.
+
         Note: reach_count and edge_counts are NOT part of the signature because
         they are context-dependent. When merging nodes, we aggregate these counts.
+
+        Reduction stops at the first layer (from the bottom) where no node merged,
+        since the trie above it is already reduced.
+
+        Returns:
+            (layers, reach, terminal_counts) describing the reduced MDD.
         """
-        # group node ids by layer
-        by_layer: List[List[int]] = [[] for _ in range(terminal_layer+1)]
-        for i, n in enumerate(nodes):
-            if n.layer <= terminal_layer:
-                by_layer[n.layer].append(i)
-
-        # mapping old->new
-        old_to_new: Dict[int, int] = {}
-
-        new_nodes: List[Node] = []
-
-        # Track which old nodes map to each new node (for aggregating counts)
-        new_to_old_list: Dict[int, List[int]] = {}
-
-        # signature: structural identity (excludes counts which get aggregated)
-        sig_map: Dict[Tuple, int] = {}
-
-        for layer in range(terminal_layer, -1, -1):
-            sig_map.clear()
-            for nid in by_layer[layer]:
-                n = nodes[nid]
-                # rewrite children ids to new ids (for layers below already processed)
-                if layer < terminal_layer:
-                    remapped_edges = {lab: old_to_new[ch] for lab, ch in n.edges.items()}
-                else:
-                    remapped_edges = dict(n.edges)  # should be empty
-
-                # Signature: structural identity only (layer, terminal_count, edge structure)
-                # Edge counts are excluded - they get aggregated when nodes merge
-                items = tuple(sorted((lab, remapped_edges[lab]) for lab in remapped_edges))
-                sig = (layer, n.terminal_count, items)
-
-                if sig in sig_map:
-                    rep = sig_map[sig]
-                    old_to_new[nid] = rep
-                    new_to_old_list[rep].append(nid)
-                else:
-                    rep = len(new_nodes)
-                    sig_map[sig] = rep
-                    old_to_new[nid] = rep
-                    new_to_old_list[rep] = [nid]
-                    new_nodes.append(Node(layer=layer, edges=remapped_edges, edge_counts={},
-                                          reach_count=0, terminal_count=n.terminal_count))
-
-        # Aggregate counts for merged nodes
-        for new_id, old_ids in new_to_old_list.items():
-            new_node = new_nodes[new_id]
-            for old_id in old_ids:
-                old_node = nodes[old_id]
-                new_node.reach_count += old_node.reach_count
-                for lab, count in old_node.edge_counts.items():
-                    new_node.edge_counts[lab] = new_node.edge_counts.get(lab, 0) + count
-
-        # new_nodes were appended in reverse-layer order; reorder by layer ascending for readability
-        # (optional). We'll rebuild a stable list and remap ids.
-        layer_groups: Dict[int, List[int]] = {}
-        for i, n in enumerate(new_nodes):
-            layer_groups.setdefault(n.layer, []).append(i)
-        ordered_old_ids = []
-        for layer in range(0, terminal_layer+1):
-            ordered_old_ids.extend(layer_groups.get(layer, []))
-
-        id_map = {old: new for new, old in enumerate(ordered_old_ids)}
-        final_nodes: List[Node] = []
-        for old in ordered_old_ids:
-            n = new_nodes[old]
-            edges = {lab: id_map[ch] for lab, ch in n.edges.items()}
-            final_nodes.append(Node(layer=n.layer, edges=edges, edge_counts=dict(n.edge_counts),
-                                    reach_count=n.reach_count, terminal_count=n.terminal_count))
-
-        # compute new root id
-        # root was old node 0 -> old_to_new[0] in new_nodes space -> id_map -> final
-        root_new_nodes = old_to_new[0]
-        root_final = id_map[root_new_nodes]
-        return final_nodes, root_final
+        depth = len(layers)
+        # terminal nodes merge when they end the same number of rows
+        new_id, terminal = pd.factorize(reach[depth])
+        new_reach: List[np.ndarray] = [np.empty(0, dtype=np.int64)] * (depth + 1)
+        new_reach[depth] = np.bincount(new_id, weights=reach[depth],
+                                       minlength=len(terminal)).astype(np.int64)
+        new_layers = list(layers)
+        new_reach[:depth] = reach[:depth]
+
+        for layer in range(depth - 1, -1, -1):
+            # In a trie every node has one parent and at least one child, so if no node
+            # of the layer below merged, the arcs of this layer all point to distinct
+            # children and nothing above can merge either: keep the rest as built.
+            if len(new_reach[layer + 1]) == len(reach[layer + 1]):
+                break
+            la = layers[layer]
+            child = new_id[la.child].astype(np.int32)
+            n_parents = len(la.parent_ptr) - 1
+
+            canon = np.lexsort((la.label_code, la.parent))
+            pairs = np.empty(2 * len(canon), dtype=np.int32)
+            pairs[0::2] = la.label_code[canon]
+            pairs[1::2] = child[canon]
+            buf = pairs.tobytes()
+            ptr = (la.parent_ptr * 8).tolist()
+            sigs = np.empty(n_parents, dtype=object)
+            sigs[:] = [buf[ptr[p]:ptr[p + 1]] for p in range(n_parents)]
+            parent_new, _ = pd.factorize(sigs)
+            n_new = int(parent_new.max()) + 1 if n_parents else 0
+
+            # each merged node keeps the arcs (in first-seen order) of its first member
+            _, rep = np.unique(parent_new, return_index=True)
+            start = la.parent_ptr[rep].astype(np.int64)
+            lengths = la.parent_ptr[rep + 1] - start
+            new_ptr = np.concatenate(([0], np.cumsum(lengths))).astype(np.int32)
+            sel = np.repeat(start - new_ptr[:-1], lengths) + np.arange(new_ptr[-1])
+
+            # arc counts are summed over all members, per (merged node, label)
+            card = max(len(la.labels), 1)
+            keys = parent_new[la.parent].astype(np.int64) * card + la.label_code
+            uniq_keys, inverse = np.unique(keys, return_inverse=True)
+            sums = np.bincount(inverse.ravel(), weights=la.count, minlength=len(uniq_keys))
+            counts = sums[np.searchsorted(uniq_keys, keys[sel])]
+
+            new_layers[layer] = LayerArrays(
+                labels=la.labels,
+                parent_ptr=new_ptr,
+                parent=np.repeat(np.arange(n_new, dtype=np.int32), lengths),
+                label_code=la.label_code[sel],
+                child=child[sel],
+                count=counts.astype(np.int32),
+            )
+            new_reach[layer] = np.bincount(parent_new, weights=reach[layer],
+                                       minlength=n_new).astype(np.int64)
+            new_id = parent_new
+
+        return new_layers, new_reach, np.asarray(terminal, dtype=np.int64)
+
+    @staticmethod
+    def _to_nodes(layers: List[LayerArrays], reach: List[np.ndarray],
+                  terminal: np.ndarray) -> List[Node]:
+        """Materialize Node objects, numbered layer by layer (root is node 0)."""
+        depth = len(layers)
+        nodes: List[Node] = []
+        starts: List[int] = []
+        for layer, r in enumerate(reach):
+            starts.append(len(nodes))
+            term = terminal.tolist() if layer == depth else [0] * len(r)
+            nodes.extend(Node(layer=layer, edges={}, edge_counts={}, reach_count=rc,
+                              terminal_count=tc) for rc, tc in zip(r.tolist(), term))
+        for layer, la in enumerate(layers):
+            labels = la.labels
+            parent_start, child_start = starts[layer], starts[layer + 1]
+            for p, c, ch, cnt in zip(la.parent.tolist(), la.label_code.tolist(),
+                                     la.child.tolist(), la.count.tolist()):
+                n = nodes[parent_start + p]
+                lab = labels[c]
+                n.edges[lab] = child_start + ch
+                n.edge_counts[lab] = cnt
+        return nodes
+
+
+def _row_bitsets(codes: np.ndarray, labels: List[List[Any]], dim_names: List[str]
+                 ) -> Dict[str, Dict[Any, np.ndarray]]:
+    """dim -> label -> np.packbits of the rows taking that label (see MDD.count)."""
+    out: Dict[str, Dict[Any, np.ndarray]] = {}
+    for i, dim in enumerate(dim_names):
+        col = codes[:, i]
+        out[dim] = {lab: np.packbits(col == c) for c, lab in enumerate(labels[i])}
+    return out
+
+def _offsets(parent: np.ndarray, n_parents: int) -> np.ndarray:
+    """CSR offsets for arcs grouped by parent index."""
+    sizes = np.bincount(parent, minlength=n_parents)
+    return np.concatenate(([0], np.cumsum(sizes))).astype(np.int32)
@@ -1,8 +1,12 @@
 from __future__ import annotations
-from dataclasses import dataclass
+import sys
+from dataclasses import dataclass, field
 from typing import Dict, Optional
 
-@dataclass(frozen=True)
+# Slotted dataclasses (no per-instance __dict__) need Python 3.10+
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(frozen=True, **_SLOTS)
 class OrderingConfig:
     strategy: str = "heuristic"  # fixed|heuristic|search
     # search knobs
@@ -11,11 +15,13 @@ class OrderingConfig:
     beam_width: int = 8
     objective: str = "nodes_plus_arcs"  # nodes|arcs|nodes_plus_arcs
     seed: int = 0
+    # Threads scoring candidate swaps of one search step in parallel (1 = sequential)
+    workers: int = 1
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class BuildConfig:
     ordering: str = "heuristic"  # fixed|heuristic|search
-    ordering_config: OrderingConfig = OrderingConfig()
+    ordering_config: OrderingConfig = field(default_factory=OrderingConfig)
     # Compilation method: trie (build trie then reduce) or slice (incremental slice-based)
     compilation_method: str = "trie"  # trie|slice
     # Compression / merging (only applies to trie method)
@@ -24,8 +30,14 @@ class BuildConfig:
     laplace_alpha: float = 0.1
     # For numeric binning if a DimensionSpec doesn't specify
     default_numeric_bins: Optional[Dict] = None
+    # Threads used to bin numeric dimensions in parallel (1 = sequential)
+    binning_workers: int = 1
+    # Keep a packed row bitset per (dimension, value) so MDD.count() is an AND and a
+    # popcount; costs n_rows / 8 bytes per distinct value. Trie compilation only: slice-compiled
+    # diagrams count paths rather than rows, which the bitsets could not reproduce
+    row_bitsets: bool = False
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class QueryConfig:
     laplace_alpha: float = 0.1
     # weight for hybrid distance/prob scoring (higher prefers probability)
@@ -1,21 +1,26 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple, Iterable
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Iterable, Iterator
 import math
 import heapq
 
-@dataclass(frozen=True)
+import numpy as np
+
+from .config import _SLOTS
+
+@dataclass(frozen=True, **_SLOTS)
 class Arc:
     label: Any
     child: int
     count: int
 
-@dataclass
+# Nodes dominate memory on large MDDs, so they carry no per-instance __dict__
+@dataclass(**_SLOTS)
 class Node:
     layer: int
     # label -> child_id
     edges: Dict[Any, int]
-    # label -> count along this outgoing arc
+    # label -> count along this outgoing arc; same keys, in the same order, as edges
     edge_counts: Dict[Any, int]
     # how many traces reach this node
     reach_count: int = 0
@@ -25,23 +30,52 @@ class Node:
         return (f"Node(layer={self.layer}, edges={len(self.edges)}, "
                 f"reach={self.reach_count}, terminal={self.terminal_count})")
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class QueryResult:
     path: Dict[str, Any]
     score: float
     details: Dict[str, Any]
 
+def _check_partial(partial: Dict[str, Any], dims: FrozenSet[str]) -> None:
+    if not isinstance(partial, dict):
+        raise TypeError(f"partial must be a dict, got {type(partial).__name__}")
+    if not dims.issuperset(partial):
+        raise ValueError(f"Unknown dimensions in partial: {set(partial) - dims}")
+
+# number of set bits of each byte value
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1)
+
+def _smallest(values: np.ndarray, n: int) -> np.ndarray:
+    """Indices of the n smallest values, in np.argsort(values, kind="stable") order.
+
+    Only values up to the n-th smallest are sorted, found by an O(len) partition.
+    """
+    if len(values) <= n:
+        return np.argsort(values, kind="stable")
+    kth = np.partition(values, n - 1)[n - 1]
+    # ties with the n-th value are kept in index order, as a stable sort would
+    sel = np.flatnonzero(values <= kth)
+    return sel[np.argsort(values[sel], kind="stable")][:n]
+
 class MDD:
     """Compressed Multi-Valued Decision Diagram."""
 
     def __init__(self, dim_names: List[str], nodes: List[Node], root: int, terminal_layer: int,
-                 laplace_alpha: float = 0.1, bin_models: Optional[Dict[str, Any]] = None):
+                 laplace_alpha: float = 0.1, bin_models: Optional[Dict[str, Any]] = None,
+                 row_bitsets: Optional[Dict[str, Dict[Any, np.ndarray]]] = None):
         self.dim_names = dim_names
+        # for validating query keys without rebuilding a set per call
+        self._dim_set = frozenset(dim_names)
         self.nodes = nodes
         self.root = root
         self.terminal_layer = terminal_layer
         self.laplace_alpha = laplace_alpha
         self.bin_models = bin_models or {}
+        # dim -> label -> packed bitset of the rows with that label (BuildConfig.row_bitsets)
+        self._row_bitsets = row_bitsets
+        self._frozen: Optional[FrozenMDD] = None
+        self._n_arcs: Optional[int] = None
+        self._layer_labels: Optional[List[FrozenSet[Any]]] = None
 
     def __repr__(self) -> str:
         size = self.size()
@@ -55,23 +89,65 @@ class MDD:
             raise ValueError(f"{name} must be a positive integer, got {k}")
 
     def _validate_partial(self, partial: Dict[str, Any]) -> None:
-        if not isinstance(partial, dict):
-            raise TypeError(f"partial must be a dict, got {type(partial).__name__}")
-        unknown = set(partial.keys()) - set(self.dim_names)
-        if unknown:
-            raise ValueError(f"Unknown dimensions in partial: {unknown}")
+        _check_partial(partial, self._dim_set)
+
+    def _has_labels(self, pattern: Dict[str, Any]) -> bool:
+        """False if some fixed value of `pattern` is on no arc of its layer (no match)."""
+        if self._layer_labels is None:
+            labels: List[set] = [set() for _ in range(self.terminal_layer)]
+            for n in self.nodes:
+                if n.layer < self.terminal_layer:
+                    labels[n.layer].update(n.edges)
+            self._layer_labels = [frozenset(s) for s in labels]
+        return all(v is None or v in self._layer_labels[layer]
+                   for layer, v in enumerate(pattern.get(d) for d in self.dim_names))
 
     # ------------------------
     # Basic traversal utilities
     # ------------------------
     def _children(self, node_id: int) -> Iterable[Tuple[Any, int, int]]:
         n = self.nodes[node_id]
-        for lab, ch in n.edges.items():
-            yield lab, ch, n.edge_counts.get(lab, 0)
+        for (lab, ch), cnt in zip(n.edges.items(), n.edge_counts.values()):
+            yield lab, ch, cnt
+
+    def edge_counts_array(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Flatten all arcs into parallel arrays, grouped by source node id.
+
+        Returns:
+            Tuple (src_ids, dst_ids, counts, labels): int32 source and child node
+            ids, int32 arc counts, and an object array of arc labels.
+        """
+        num_arcs = sum(len(n.edges) for n in self.nodes)
+        src = np.empty(num_arcs, dtype=np.int32)
+        dst = np.empty(num_arcs, dtype=np.int32)
+        counts = np.empty(num_arcs, dtype=np.int32)
+        labels = np.empty(num_arcs, dtype=object)
+        i = 0
+        for nid, n in enumerate(self.nodes):
+            j = i + len(n.edges)
+            src[i:j] = nid
+            dst[i:j] = list(n.edges.values())
+            counts[i:j] = list(n.edge_counts.values())
+            for lab in n.edges:
+                labels[i] = lab  # element-wise so tuple labels are not broadcast
+                i += 1
+        return src, dst, counts, labels
+
+    def freeze(self) -> FrozenMDD:
+        """Array (CSR) layout of this MDD for batch queries, built once and cached.
+
+        The MDD is treated as immutable once built: the frozen copy reflects the
+        nodes as they were on the first call.
+        """
+        if self._frozen is None:
+            self._frozen = FrozenMDD(self)
+        return self._frozen
 
     def size(self) -> Dict[str, int]:
-        arcs = sum(len(n.edges) for n in self.nodes)
-        return {"nodes": len(self.nodes), "arcs": arcs, "layers": self.terminal_layer}
+        # counted once, like freeze(): the MDD is immutable once built
+        if self._n_arcs is None:
+            self._n_arcs = sum(len(n.edges) for n in self.nodes)
+        return {"nodes": len(self.nodes), "arcs": self._n_arcs, "layers": self.terminal_layer}
 
     # ------------------------
     # Exact existence
@@ -112,23 +188,40 @@ class MDD:
         if pattern is None:
             pattern = {}
         self._validate_partial(pattern)
+        fixed = {dim: v for dim, v in pattern.items() if v is not None}
+        if self._row_bitsets is not None and fixed:
+            # rows matching every fixed value: AND of their row bitsets, then popcount
+            acc = None
+            for dim, v in fixed.items():
+                bits = self._row_bitsets[dim].get(v)
+                if bits is None:
+                    return 0
+                acc = bits.copy() if acc is None else np.bitwise_and(acc, bits, out=acc)
+            return int(_POPCOUNT[acc].sum())
+        return self.freeze().count(pattern)
+
+    def counts_by(self, dim: str) -> Dict[Any, int]:
+        """Count rows per value of one dimension in a single pass.
+
+        Every row crosses exactly one arc of the dimension's layer, so the arc
+        counts summed per label give the row count of every value at once,
+        instead of one count() descent per value.
 
-        def _count_dfs(nid: int, layer: int) -> int:
-            if layer == self.terminal_layer:
-                return self.nodes[nid].terminal_count
-            dim = self.dim_names[layer]
-            n = self.nodes[nid]
-            want = pattern.get(dim, None)
-            total = 0
-            if want is None:
-                for lab, ch in n.edges.items():
-                    total += _count_dfs(ch, layer + 1)
-            else:
-                if want in n.edges:
-                    total = _count_dfs(n.edges[want], layer + 1)
-            return total
+        Args:
+            dim: Dimension name.
 
-        return _count_dfs(self.root, 0)
+        Returns:
+            Dict mapping each value of `dim` to its number of rows.
+        """
+        if dim not in self.dim_names:
+            raise ValueError(f"Unknown dimension: {dim}")
+        layer = self.dim_names.index(dim)
+        totals: Dict[Any, int] = {}
+        for n in self.nodes:
+            if n.layer == layer:
+                for lab, c in n.edge_counts.items():
+                    totals[lab] = totals.get(lab, 0) + c
+        return totals
 
     # ------------------------
     # Pattern match with wildcards (brute DFS)
@@ -147,43 +240,70 @@ class MDD:
         if limit < 1:
             raise ValueError(f"limit must be positive, got {limit}")
 
+        # an unknown value would otherwise be found only after a DFS down to its layer
+        if not self._has_labels(pattern):
+            return []
+
         out: List[Dict[str, Any]] = []
+        nodes, terminal_layer = self.nodes, self.terminal_layer
+        dims = self.dim_names[:terminal_layer]
+        wanted = [pattern.get(dim, None) for dim in dims]
 
-        def dfs(nid: int, layer: int, acc: Dict[str, Any]) -> None:
-            if len(out) >= limit:
-                return
-            if layer == self.terminal_layer:
-                if self.nodes[nid].terminal_count > 0:
-                    out.append(dict(acc))
-                return
-            dim = self.dim_names[layer]
-            want = pattern.get(dim, None)
-            n = self.nodes[nid]
+        def arcs(nid: int, layer: int) -> Iterator[Tuple[Any, int]]:
+            edges = nodes[nid].edges
+            want = wanted[layer]
             if want is None:
-                for lab, ch in n.edges.items():
-                    acc[dim] = lab
-                    dfs(ch, layer+1, acc)
-                acc.pop(dim, None)
-            else:
-                if want in n.edges:
-                    acc[dim] = want
-                    dfs(n.edges[want], layer+1, acc)
-                    acc.pop(dim, None)
-
-        dfs(self.root, 0, {})
+                return iter(edges.items())
+            # a fixed label not on the node is a dead end
+            return iter(((want, edges[want]),) if want in edges else ())
+
+        if terminal_layer == 0:
+            return [{}] if nodes[self.root].terminal_count > 0 else []
+
+        # The path buffer has every dim as a key up front, so a step overwrites one
+        # entry and a match is a plain dict copy.
+        last = terminal_layer - 1
+        path: Dict[str, Any] = dict.fromkeys(dims)
+
+        last_dim, last_want = dims[last], wanted[last]
+
+        def scan(nid: int) -> bool:
+            """Emit the matches through a last-layer node; True once limit is hit."""
+            edges = nodes[nid].edges
+            if last_want is not None:
+                leaf = edges.get(last_want)
+                if leaf is None or nodes[leaf].terminal_count <= 0:
+                    return False
+                path[last_dim] = last_want
+                out.append(path.copy())
+                return len(out) >= limit
+            for path[last_dim], leaf in edges.items():
+                if nodes[leaf].terminal_count > 0:
+                    out.append(path.copy())
+                    if len(out) >= limit:
+                        return True
+            return False
+
+        if last == 0:
+            scan(self.root)
+            return out
+
+        # Iterative DFS down to the last layer: stack[i] iterates the arcs still to
+        # try at layer i, so no Python frame is pushed per step.
+        stack = [arcs(self.root, 0)]
+        while stack:
+            layer = len(stack) - 1
+            step = next(stack[layer], None)
+            if step is None:
+                stack.pop()
+                continue
+            path[dims[layer]], ch = step
+            if layer + 1 < last:
+                stack.append(arcs(ch, layer + 1))
+            elif scan(ch):
+                break
         return out
 
-    # ------------------------
-    # Conditional probability helpers
-    # ------------------------
-    def _cond_prob(self, nid: int, label: Any) -> float:
-        n = self.nodes[nid]
-        total = float(sum(n.edge_counts.values()))
-        k = float(len(n.edge_counts))
-        alpha = float(self.laplace_alpha)
-        num = float(n.edge_counts.get(label, 0))
-        return (num + alpha) / (total + alpha * max(k, 1.0))
-
     # ------------------------
     # Completion: top-k by MAP (beam search)
     # ------------------------
@@ -203,55 +323,60 @@ class MDD:
         if beam < 1:
             raise ValueError(f"beam must be positive, got {beam}")
 
-        # beam items: (neg_logprob, nid, layer, path_dict)
-        start = (0.0, self.root, 0, {})
-        beam_list = [start]
+        # Each layer scores all successors of the beam at once from the frozen per-arc
+        # log-probabilities; steps[i] = (beam index of the parent, arc taken) per kept
+        # item, so paths are only built for the results.
+        frozen = self.freeze()
+        wanted = frozen._wanted_codes(partial)
+        if -1 in wanted:
+            # a fixed value no arc carries: no completion, without searching down to it
+            return []
+        neglogp = np.zeros(1)
+        beam_nodes = np.array([self.root], dtype=np.int64)
+        steps: List[Tuple[np.ndarray, np.ndarray]] = []
 
         for layer in range(self.terminal_layer):
-            dim = self.dim_names[layer]
-            new_beam = []
-            for neglogp, nid, _, path in beam_list:
-                n = self.nodes[nid]
-                fixed = partial.get(dim, None)
-                if fixed is not None:
-                    if fixed in n.edges:
-                        p = self._cond_prob(nid, fixed)
-                        nd = n.edges[fixed]
-                        npth = dict(path); npth[dim] = fixed
-                        new_beam.append((neglogp - math.log(max(p, 1e-15)), nd, layer+1, npth))
-                    # else: dead end
-                else:
-                    for lab, nd in n.edges.items():
-                        p = self._cond_prob(nid, lab)
-                        npth = dict(path); npth[dim] = lab
-                        new_beam.append((neglogp - math.log(max(p, 1e-15)), nd, layer+1, npth))
-            new_beam.sort(key=lambda t: t[0])
-            beam_list = new_beam[:beam]
-
-            if not beam_list:
+            arcs, parents = frozen._expand(beam_nodes)
+            if wanted[layer] is not None:
+                # a fixed label not on the node is a dead end
+                keep = frozen.label_codes[arcs] == wanted[layer]
+                arcs, parents = arcs[keep], parents[keep]
+            cand = neglogp[parents] - frozen.arc_logprob[arcs]
+            best = _smallest(cand, beam)
+            neglogp = cand[best]
+            beam_nodes = frozen.children[arcs[best]].astype(np.int64)
+            steps.append((parents[best], arcs[best]))
+
+            if not len(best):
                 break
 
         # finalize
-        beam_list.sort(key=lambda t: t[0])
         results: List[QueryResult] = []
-        for neglogp, nid, layer, path in beam_list:
-            if layer == self.terminal_layer and self.nodes[nid].terminal_count > 0:
-                results.append(QueryResult(path=path, score=-neglogp, details={"logprob": -neglogp}))
-                if len(results) >= k:
-                    break
+        for i in np.flatnonzero(frozen.terminal_counts[beam_nodes] > 0)[:k].tolist():
+            score = -float(neglogp[i])
+            labels = []
+            for layer in range(len(steps) - 1, -1, -1):
+                parents, arcs = steps[layer]
+                labels.append(frozen._label(layer, arcs[i:i+1])[0])
+                i = int(parents[i])
+            path = dict(zip(self.dim_names, reversed(labels)))
+            results.append(QueryResult(path=path, score=score, details={"logprob": score}))
         return results
 
     # ------------------------
     # Nearest: A* over layered DAG with per-dimension distance
     # (distance model is passed in via dist_fn[dim](want, candidate)->cost)
     # ------------------------
-    def nearest(self, partial: Dict[str, Any], dist_fns: Dict[str, Any], k: int = 5) -> List[QueryResult]:
+    def nearest(self, partial: Dict[str, Any], dist_fns: Dict[str, Any], k: int = 5,
+                compute_logprob: bool = True) -> List[QueryResult]:
         """Find k-nearest paths using A* search with custom distance functions.
 
         Args:
             partial: Dict with target dimension values.
             dist_fns: Dict mapping dimension names to distance functions (a, b) -> float.
             k: Number of results to return.
+            compute_logprob: Include each path's log-probability in details["logprob"];
+                set False to skip it when only distances are needed.
 
         Returns:
             List of QueryResult with path, score (negative distance), and details.
@@ -259,43 +384,269 @@ class MDD:
         self._validate_partial(partial)
         self._validate_k(k)
 
-        # State: (f, g, counter, -logp, nid, layer, path)
-        # f = g + h; h is 0 (admissible but weak)
-        # counter ensures unique comparison for heapq tiebreaking
-        pq = []
-        counter = 0
-        heapq.heappush(pq, (0.0, 0.0, counter, 0.0, self.root, 0, {}))
-        counter += 1
+        frozen = self.freeze()
+        children, indptr = frozen.children.tolist(), frozen.indptr.tolist()
+        node_layer = frozen.layer.tolist()
+
+        # A step's cost depends only on its layer and label, so each distinct label of
+        # a constrained layer is scored once.
+        arc_cost = np.zeros(len(frozen.children))
+        for layer, dim in enumerate(self.dim_names):
+            want = partial.get(dim, None)
+            if want is None:
+                continue
+            fn = dist_fns.get(dim)
+            costs = np.array([float(fn(want, lab)) if fn else (0.0 if want == lab else 1.0)
+                              for lab in frozen.vocab[layer]])
+            arcs = frozen.layer_arcs[layer]
+            arc_cost[arcs] = costs[frozen.label_codes[arcs]]
+
+        # h = exact cheapest remaining cost to a terminal, by DP from the terminal layer
+        # up; it is admissible and consistent, and inf marks dead ends, never pushed.
+        remaining = np.full(len(frozen.layer), np.inf)
+        remaining[(frozen.layer == self.terminal_layer) & (frozen.terminal_counts > 0)] = 0.0
+        for layer in range(self.terminal_layer - 1, -1, -1):
+            arcs = frozen.layer_arcs[layer]
+            np.minimum.at(remaining, frozen.tails[arcs],
+                          arc_cost[arcs] + remaining[frozen.children[arcs]])
+        h = remaining.tolist()
+        cost = arc_cost.tolist()
+
+        # State: (f, -layer, counter, g, nid, trail index); trail[i] = (parent index, arc).
+        # Every pushed state is a distinct path prefix; equal f prefers deeper states.
+        # A node's k cheapest prefixes are enough for the k cheapest paths through it.
+        pq = [(h[self.root], 0, 0, 0.0, self.root, -1)] if h[self.root] < math.inf else []
+        counter = 1
+        trail: List[Tuple[int, int]] = []
+        pops = [0] * len(h)
         results: List[QueryResult] = []
-        seen = set()
+        # hoisted out of the per-pop and per-arc loop bodies
+        terminal_layer, inf = self.terminal_layer, math.inf
+        heappush, heappop, add_trail = heapq.heappush, heapq.heappop, trail.append
 
         while pq and len(results) < k:
-            f, g, _, neglogp, nid, layer, path = heapq.heappop(pq)
-            key = (nid, layer, tuple(sorted(path.items())))
-            if key in seen:
+            _, _, _, g, nid, t = heappop(pq)
+            if pops[nid] >= k:
                 continue
-            seen.add(key)
-
-            if layer == self.terminal_layer:
-                if self.nodes[nid].terminal_count > 0:
-                    score = -g  # distance-only score (negative cost)
-                    results.append(QueryResult(path=path, score=score, details={"distance": g, "logprob": -neglogp}))
+            pops[nid] += 1
+
+            layer = node_layer[nid]
+            if layer == terminal_layer:
+                arcs = []
+                while t >= 0:
+                    t, arc = trail[t]
+                    arcs.append(arc)
+                arcs.reverse()
+                path = {dim: frozen.vocab[i][int(frozen.label_codes[arc])]
+                        for i, (dim, arc) in enumerate(zip(self.dim_names, arcs))}
+                # distance-only score (negative cost); prob term is tracked for callers
+                details = {"distance": g}
+                if compute_logprob:
+                    details["logprob"] = float(frozen.arc_logprob[arcs].sum())
+                results.append(QueryResult(path=path, score=-g, details=details))
                 continue
 
-            dim = self.dim_names[layer]
-            want = partial.get(dim, None)
-            n = self.nodes[nid]
-            for lab, nd in n.edges.items():
-                step = 0.0
-                if want is not None:
-                    fn = dist_fns.get(dim)
-                    step = float(fn(want, lab)) if fn else (0.0 if want == lab else 1.0)
-                # prob term is tracked for hybrid usage by caller if desired
-                p = self._cond_prob(nid, lab)
-                nneglogp = neglogp - math.log(max(p, 1e-15))
-                npth = dict(path); npth[dim] = lab
-                ng = g + step
-                heapq.heappush(pq, (ng, ng, counter, nneglogp, nd, layer+1, npth))
+            depth = -(layer + 1)
+            for arc in range(indptr[nid], indptr[nid + 1]):
+                nd = children[arc]
+                hn = h[nd]
+                if hn == inf:
+                    continue
+                ng = g + cost[arc]
+                add_trail((t, arc))
+                heappush(pq, (ng + hn, depth, counter, ng, nd, len(trail) - 1))
                 counter += 1
 
         return results
+
+
+class FrozenMDD:
+    """Read-only CSR layout of an MDD, for queries that work on whole layers at once.
+
+    The arcs of node i are ``indptr[i]:indptr[i+1]``, in the node's edge order, as
+    parallel ``tails``/``children``/``counts``/``label_codes``/``labels`` arrays. Labels are
+    stored once per layer in ``vocab`` and arcs refer to them by code, so a query
+    hashes each wanted value once rather than once per visited arc.
+
+    Build it with MDD.freeze().
+    """
+
+    def __init__(self, mdd: MDD):
+        self.dim_names = list(mdd.dim_names)
+        self._dim_set = mdd._dim_set
+        self.root = mdd.root
+        self.terminal_layer = mdd.terminal_layer
+        nodes = mdd.nodes
+        n_nodes = len(nodes)
+        self.layer = np.array([n.layer for n in nodes], dtype=np.int32)
+        self.terminal_counts = np.array([n.terminal_count for n in nodes], dtype=np.int64)
+
+        tails, children, counts, labels = mdd.edge_counts_array()
+        self.tails = tails
+        self.children = children
+        self.counts = counts.astype(np.int64)
+        self.labels = labels
+        out_degree = np.bincount(tails, minlength=n_nodes)
+        self.indptr = np.concatenate(([0], np.cumsum(out_degree)))
+
+        # Laplace-smoothed log P(label | node) per arc: (count + alpha) / (total + alpha * k)
+        alpha = float(mdd.laplace_alpha)
+        totals = np.bincount(tails, weights=counts, minlength=n_nodes)
+        self.cond_denom = totals + alpha * np.maximum(out_degree, 1)
+        self.arc_logprob = np.log(np.maximum((self.counts + alpha) / self.cond_denom[tails],
+                                             1e-15))
+
+        # per layer: the arcs leaving it, and their labels factorized into codes
+        arc_layer = self.layer[tails]
+        self.label_codes = np.zeros(len(tails), dtype=np.int32)
+        self.layer_arcs: List[np.ndarray] = []
+        self.vocab: List[List[Any]] = []
+        self._label_code: List[Dict[Any, int]] = []
+        for layer in range(self.terminal_layer):
+            arcs = np.flatnonzero(arc_layer == layer)
+            codes: Dict[Any, int] = {}
+            self.label_codes[arcs] = [codes.setdefault(lab, len(codes)) for lab in labels[arcs]]
+            self.layer_arcs.append(arcs)
+            self.vocab.append(list(codes))
+            self._label_code.append(codes)
+
+        # per layer: its arcs grouped by label code, so the arcs of one label are a
+        # slice _arcs_by_code[layer][ptr[code]:ptr[code+1]] rather than a scan
+        self._arcs_by_code: List[np.ndarray] = []
+        self._code_ptr: List[np.ndarray] = []
+        for layer, arcs in enumerate(self.layer_arcs):
+            codes_l = self.label_codes[arcs]
+            self._arcs_by_code.append(arcs[np.argsort(codes_l, kind="stable")])
+            self._code_ptr.append(np.concatenate(
+                ([0], np.cumsum(np.bincount(codes_l, minlength=len(self.vocab[layer]))))))
+
+        # sorted (tail, label code) keys for single-arc lookups
+        self._stride = max([len(v) for v in self.vocab] + [1])
+        keys = tails.astype(np.int64) * self._stride + self.label_codes
+        self._key_order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._key_order]
+
+    def __repr__(self) -> str:
+        return (f"FrozenMDD(dims={self.dim_names}, nodes={len(self.layer)}, "
+                f"arcs={len(self.children)})")
+
+    def _code(self, layer: int, label: Any) -> int:
+        """Code of `label` in `layer`, or -1 if no arc of that layer carries it."""
+        return self._label_code[layer].get(label, -1)
+
+    def _arc(self, nid: int, code: int) -> int:
+        """Index of the arc of `nid` with label `code`, or -1."""
+        key = nid * self._stride + code
+        i = int(np.searchsorted(self._sorted_keys, key))
+        if i < len(self._sorted_keys) and self._sorted_keys[i] == key:
+            return int(self._key_order[i])
+        return -1
+
+    def _wanted_codes(self, pattern: Dict[str, Any]) -> List[Optional[int]]:
+        """Per layer, the label code `pattern` fixes (-1 if absent), or None for a wildcard."""
+        wanted: List[Optional[int]] = []
+        for layer, dim in enumerate(self.dim_names):
+            want = pattern.get(dim, None)
+            wanted.append(None if want is None else self._code(layer, want))
+        return wanted
+
+    def _allowed_arcs(self, layer: int, code: Optional[int]) -> np.ndarray:
+        """Arcs leaving `layer`: all of them for a wildcard (None), else those labeled `code`."""
+        if code is None:
+            return self.layer_arcs[layer]
+        if code < 0:
+            return self.layer_arcs[layer][:0]
+        ptr = self._code_ptr[layer]
+        return self._arcs_by_code[layer][ptr[code]:ptr[code + 1]]
+
+    def _expand(self, frontier: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """All arcs leaving `frontier` nodes, in order, with the frontier index of each."""
+        starts = self.indptr[frontier]
+        lengths = self.indptr[frontier + 1] - starts
+        offsets = np.cumsum(lengths) - lengths
+        arcs = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+        return arcs, np.repeat(np.arange(len(frontier)), lengths)
+
+    def _label(self, layer: int, arcs: np.ndarray) -> List[Any]:
+        vocab = self.vocab[layer]
+        return [vocab[c] for c in self.label_codes[arcs].tolist()]
+
+    def exists(self, x: Dict[str, Any]) -> bool:
+        """Check if an exact path exists (same semantics as MDD.exists)."""
+        nid = self.root
+        for layer, dim in enumerate(self.dim_names):
+            if dim not in x:
+                return False
+            code = self._code(layer, x[dim])
+            arc = self._arc(nid, code) if code >= 0 else -1
+            if arc < 0:
+                return False
+            nid = int(self.children[arc])
+        return bool(self.terminal_counts[nid] > 0)
+
+    def count(self, pattern: Optional[Dict[str, Any]] = None) -> int:
+        """Count paths matching a pattern (same semantics as MDD.count).
+
+        Path counts are pushed forward one layer at a time over the arcs the
+        pattern allows, instead of a recursive descent per path.
+        """
+        if pattern is None:
+            pattern = {}
+        _check_partial(pattern, self._dim_set)
+        wanted = self._wanted_codes(pattern)
+        if -1 in wanted:
+            return 0
+        paths = np.zeros(len(self.layer), dtype=np.int64)
+        paths[self.root] = 1
+        for layer in range(self.terminal_layer):
+            arcs = self._allowed_arcs(layer, wanted[layer])
+            # path counts never exceed the number of distinct rows, so float64
+            # bincount weights are exact
+            paths += np.bincount(self.children[arcs], weights=paths[self.tails[arcs]],
+                                 minlength=len(paths)).astype(np.int64)
+        at_terminal = self.layer == self.terminal_layer
+        return int(paths[at_terminal] @ self.terminal_counts[at_terminal])
+
+    def match(self, pattern: Dict[str, Any], limit: int = 1000) -> List[Dict[str, Any]]:
+        """Find paths matching a pattern, in the same order as MDD.match.
+
+        A backward pass first marks the nodes from which some matching path reaches
+        a terminal. Every node kept in the forward pass then yields at least one
+        result, so each layer's frontier can be cut to `limit` entries, and paths
+        are expanded one layer at a time instead of one arc at a time.
+        """
+        _check_partial(pattern, self._dim_set)
+        if limit < 1:
+            raise ValueError(f"limit must be positive, got {limit}")
+
+        wanted = self._wanted_codes(pattern)
+        if -1 in wanted:
+            return []
+        viable = (self.layer == self.terminal_layer) & (self.terminal_counts > 0)
+        for layer in range(self.terminal_layer - 1, -1, -1):
+            arcs = self._allowed_arcs(layer, wanted[layer])
+            viable[self.tails[arcs[viable[self.children[arcs]]]]] = True
+
+        frontier = np.array([self.root] if viable[self.root] else [], dtype=np.int64)
+        # per layer: (index of the parent path in the previous frontier, arc taken)
+        steps: List[Tuple[np.ndarray, np.ndarray]] = []
+        for layer in range(self.terminal_layer):
+            arcs, parents = self._expand(frontier)
+            keep = viable[self.children[arcs]]
+            if wanted[layer] is not None:
+                keep &= self.label_codes[arcs] == wanted[layer]
+            arcs, parents = arcs[keep][:limit], parents[keep][:limit]
+            steps.append((parents, arcs))
+            frontier = self.children[arcs].astype(np.int64)
+
+        n_out = min(len(frontier), limit)
+        columns: List[List[Any]] = []
+        path = np.arange(n_out)
+        for layer in range(self.terminal_layer - 1, -1, -1):
+            parents, arcs = steps[layer]
+            columns.append(self._label(layer, arcs[path]))
+            path = parents[path]
+        if not columns:
+            return [{} for _ in range(n_out)]
+        columns.reverse()
+        return [dict(zip(self.dim_names, values)) for values in zip(*columns)]
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Dict, List, Tuple, Optional
 import numpy as np
@@ -14,9 +15,11 @@ class OrderEval:
     diagnostics: Dict[str, float]
 
 def _entropy(s: pd.Series) -> float:
-    vc = s.value_counts(dropna=False)
-    p = (vc / vc.sum()).to_numpy(dtype=float)
-    return float(-(p * np.log2(np.clip(p, 1e-12, 1.0))).sum())
+    # counted in the column's own dtype; unused categories count 0 and are skipped. Summed in
+    # sorted order so equal count distributions give bit-identical entropies (and tie on name)
+    counts = np.sort(s.value_counts(dropna=False, sort=False).to_numpy(dtype=float))
+    p = counts / counts.sum()
+    return float(-np.sum(p * np.log2(p, where=counts > 0, out=np.zeros_like(p))))
 
 def propose_order(df: pd.DataFrame, schema: Schema, cfg: OrderingConfig) -> OrderEval:
     """Heuristic proposal: combine entropy + effective cardinality.
@@ -29,7 +32,7 @@ def propose_order(df: pd.DataFrame, schema: Schema, cfg: OrderingConfig) -> Orde
     scores = []
     for c in cols:
         s = df[c]
-        ent = _entropy(s.astype("object"))
+        ent = _entropy(s)
         card = float(s.nunique(dropna=False))
         # numeric: use binned-cardinality proxy via quantiles if not already binned
         if schema.get(c).dtype == DimensionType.NUMERIC:
@@ -43,41 +46,97 @@ def propose_order(df: pd.DataFrame, schema: Schema, cfg: OrderingConfig) -> Orde
     order = [c for _, c in scores]
     return OrderEval(order=order, est_score=float(sum(sc for sc,_ in scores)), diagnostics=diag)
 
+def _column_codes(df: pd.DataFrame, cols: List[str]) -> Dict[str, Tuple[np.ndarray, int]]:
+    """Factorize each column once: name -> (int64 codes, number of distinct values)."""
+    out = {}
+    for c in cols:
+        codes, uniques = pd.factorize(df[c], use_na_sentinel=False)
+        out[c] = (codes.astype(np.int64, copy=False), max(len(uniques), 1))
+    return out
+
+def _refine(group: np.ndarray, col: Tuple[np.ndarray, int]) -> Tuple[np.ndarray, int]:
+    """Split the row groups of a prefix by one more column; returns (groups, n_groups)."""
+    codes, card = col
+    refined, uniques = pd.factorize(group * card + codes)
+    return refined.astype(np.int64, copy=False), len(uniques)
+
+def _prefix_groups(codes: Dict[str, Tuple[np.ndarray, int]], order: List[str], n_rows: int,
+                   start: int = 0, group: Optional[np.ndarray] = None
+                   ) -> Tuple[List[np.ndarray], List[int]]:
+    """Row groups and distinct counts of the prefixes order[:start+1], ..., order[:len]."""
+    group = np.zeros(n_rows, dtype=np.int64) if group is None else group
+    groups, counts = [], []
+    for c in order[start:]:
+        group, n = _refine(group, codes[c])
+        groups.append(group)
+        counts.append(n)
+    return groups, counts
+
 def evaluate_order(df: pd.DataFrame, order: List[str]) -> Dict[str, float]:
     """Lightweight evaluation proxy: sum of prefix distinct counts."""
-    prefix = []
-    total = 0.0
-    for c in order:
-        prefix.append(c)
-        total += float(df[prefix].drop_duplicates().shape[0])
-    return {"prefix_distinct_sum": total}
+    _, counts = _prefix_groups(_column_codes(df, order), order, len(df))
+    return {"prefix_distinct_sum": float(sum(counts))}
 
 def search_order(df: pd.DataFrame, schema: Schema, cfg: OrderingConfig) -> OrderEval:
     """Budgeted randomized local search using the proxy objective.
 
     Terminates when either max_evals or time_budget_s is exceeded.
+
+    Columns are factorized once, and each prefix is refined from the previous one.
+    Swapping positions i < j leaves the column sets, hence the distinct counts, of
+    all prefixes before i and from j on unchanged, so only prefixes i..j-1 are
+    recomputed for a candidate.
+
+    With cfg.workers > 1, each step draws that many swaps of the current best order,
+    scores them on a thread pool (the work is NumPy/pandas hashing over shared codes)
+    and keeps the best improving one.
     """
     import time
 
     rng = np.random.default_rng(cfg.seed)
     cols = schema.names()
+    n_rows = len(df)
+    codes = _column_codes(df, cols)
     best = cols[:]
-    best_score = evaluate_order(df, best)["prefix_distinct_sum"]
+    best_groups, best_counts = _prefix_groups(codes, best, n_rows)
+    best_score = float(sum(best_counts))
     evals = 1
     start_time = time.time()
 
-    while evals < cfg.max_evals:
-        # Check time budget
-        if (time.time() - start_time) >= cfg.time_budget_s:
-            break
-
+    def score_swap(ij: Tuple[int, int]):
+        """(score, i, order, prefix groups i..j-1, their counts) of swapping i <= j in best."""
+        i, j = ij
+        if i == j:
+            return None
         cand = best[:]
-        i, j = rng.integers(0, len(cols), size=2)
         cand[i], cand[j] = cand[j], cand[i]
-        sc = evaluate_order(df, cand)["prefix_distinct_sum"]
-        evals += 1
-        if sc < best_score:
-            best, best_score = cand, sc
+        groups, counts = _prefix_groups(codes, cand[:j], n_rows, start=i,
+                                        group=best_groups[i-1] if i else None)
+        return best_score - sum(best_counts[i:j]) + sum(counts), i, cand, groups, counts
+
+    pool = ThreadPoolExecutor(max_workers=cfg.workers) if cfg.workers > 1 else None
+    try:
+        while evals < cfg.max_evals:
+            # Check time budget
+            if (time.time() - start_time) >= cfg.time_budget_s:
+                break
+
+            n = min(cfg.workers, cfg.max_evals - evals) if pool else 1
+            swaps = [tuple(sorted(rng.integers(0, len(cols), size=2).tolist())) for _ in range(n)]
+            evals += n
+            scored = [r for r in (pool.map(score_swap, swaps) if pool else map(score_swap, swaps))
+                      if r is not None]
+            if not scored:
+                continue
+            # min() keeps the first of equal scores, i.e. the earliest drawn swap
+            sc, i, cand, groups, counts = min(scored, key=lambda r: r[0])
+            if sc < best_score:
+                best, best_score = cand, sc
+                best_groups[i:i + len(groups)] = groups
+                best_counts[i:i + len(counts)] = counts
+    finally:
+        if pool:
+            pool.shutdown()
 
     elapsed = time.time() - start_time
     diag = {"prefix_distinct_sum": float(best_score), "evals": float(evals), "elapsed_s": elapsed}
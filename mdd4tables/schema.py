@@ -3,13 +3,15 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import Any, Dict, Iterable, List, Optional
 
+from .config import _SLOTS
+
 class DimensionType(str, Enum):
     CATEGORICAL = "categorical"
     ORDINAL = "ordinal"
     NUMERIC = "numeric"
     MIXED = "mixed"
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, **_SLOTS)
 class DimensionSpec:
     name: str
     dtype: DimensionType
@@ -19,7 +21,7 @@ class DimensionSpec:
     # Missing handling: token to insert when missing during build
     missing_token: Any = "__MISSING__"
 
-@dataclass
+@dataclass(**_SLOTS)
 class Schema:
     dims: List[DimensionSpec]
     name_to_index: Dict[str, int] = field(init=False)
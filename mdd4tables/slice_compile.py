@@ -1,24 +1,28 @@
 from __future__ import annotations
 from dataclasses import dataclass
-from typing import Any, Dict, List, Tuple
+from typing import Any, List, Mapping, Optional, Tuple, Union
 
+import numpy as np
 import pandas as pd
 
 from .mdd import Node
 from .schema import Schema
 
-def _slice_signature(df: pd.DataFrame, remaining_dims: List[str]) -> Tuple:
-    """Hashable signature of a slice π_P(σ_R(CB)).
+def factorize_columns(columns: Union[pd.DataFrame, Mapping[str, pd.Series]],
+                      dim_names: List[str], n_rows: int) -> Tuple[np.ndarray, List[List[Any]]]:
+    """Factorize each dimension column into int32 codes.
 
-    Slice is represented as the sorted set of tuples of the remaining dimensions.
-    This follows Nicholson, Bridge, and Wilson (2006), Algorithm 1.
+    Returns:
+        (codes, labels): codes[r, i] indexes labels[i], the distinct values of
+        dimension i as Python scalars, in order of first appearance.
     """
-    if not remaining_dims:
-        return ("<EMPTY_PROJECTION>",)
-    proj = df[remaining_dims].drop_duplicates()
-    tuples = [tuple(r) for r in proj.itertuples(index=False, name=None)]
-    tuples.sort()
-    return tuple(tuples)
+    codes = np.empty((n_rows, len(dim_names)), dtype=np.int32)
+    labels: List[List[Any]] = []
+    for i, dim in enumerate(dim_names):
+        col_codes, uniques = pd.factorize(columns[dim], use_na_sentinel=False)
+        codes[:, i] = col_codes
+        labels.append(uniques.tolist())
+    return codes, labels
 
 @dataclass
 class SliceCompiler:
@@ -26,55 +30,134 @@ class SliceCompiler:
     schema: Schema
     dim_names: List[str]
 
-    def compile(self, df: pd.DataFrame) -> Tuple[List[Node], int, int]:
-        working = df[self.dim_names].copy()
-
-        nodes: List[Node] = []
+    def compile(self, df: Union[pd.DataFrame, Mapping[str, pd.Series]],
+                n_rows: Optional[int] = None) -> Tuple[List[Node], int, int]:
+        """Compile rows into a reduced MDD.
+
+        Args:
+            df: DataFrame, or mapping of dimension name to column.
+            n_rows: Number of rows (defaults to len(df), which a mapping lacks).
+
+        Returns:
+            (nodes, root, terminal_layer)
+        """
+        n_rows = len(df) if n_rows is None else n_rows
+        codes, labels = factorize_columns(df, self.dim_names, n_rows)
+        return self.compile_codes(codes, labels)
+
+    def compile_codes(self, codes: np.ndarray, labels: List[List[Any]]
+                      ) -> Tuple[List[Node], int, int]:
+        """Compile factorized rows (see factorize_columns) into a reduced MDD.
+
+        Rows are walked and sliced as int32 codes rather than as pandas rows;
+        labels are only decoded when arcs are written to the nodes. All rows advance
+        one layer at a time, so each layer is a few vectorized passes instead of a
+        Python loop over rows.
+
+        A slice π_P(σ_R(CB)) is represented as the sorted set of ids of its distinct
+        suffix rows, serialized to bytes; this follows Nicholson, Bridge, and Wilson
+        (2006), Algorithm 1.
+
+        Returns:
+            (nodes, root, terminal_layer)
+        """
+        n_rows, depth = codes.shape
+        cards = [max(len(lab), 1) for lab in labels]
+        stride = max(cards + [1])
+
+        # suffix_id[i][r] numbers the distinct suffixes codes[r, i:] at layer i, so a
+        # slice (a set of suffix rows) is the sorted set of its suffix ids.
+        suffix_id: List[np.ndarray] = [np.zeros(n_rows, dtype=np.int64)] * (depth + 1)
+        n_suffix = [1] * (depth + 1)
+        for i in range(depth - 1, -1, -1):
+            sid, uniq = pd.factorize(suffix_id[i+1] * cards[i] + codes[:, i])
+            suffix_id[i], n_suffix[i] = sid.astype(np.int64, copy=False), max(len(uniq), 1)
+
+        # Rows sharing the prefix codes[:, :i+1] form one group; group_rows lists the
+        # rows grouped by that prefix, so the rows of a slice are a contiguous run.
+        group = np.zeros(n_rows, dtype=np.int64)
+
+        # Rows are walked one layer at a time: all rows at the same node taking the same
+        # label follow one arc, whose child is the node of its slice π_P(σ_R(CB)).
+        visits = np.zeros((n_rows, depth + 1), dtype=np.int64)
+        node_layer = [0]
+        node_first_row = [0]
+        arc_parent: List[np.ndarray] = []
+        arc_code: List[np.ndarray] = []
+        arc_child: List[np.ndarray] = []
+        arc_first_row: List[np.ndarray] = []
+        for i in range(depth):
+            group, uniques = pd.factorize(group * cards[i] + codes[:, i])
+            group = group.astype(np.int64, copy=False)
+            group_rows = np.argsort(group, kind="stable")
+            group_ptr = np.concatenate(([0], np.cumsum(np.bincount(group,
+                                                                   minlength=len(uniques)))))
+
+            keys = visits[:, i] * stride + codes[:, i]
+            arc_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+            # the slice of an arc is that of the prefix group of any row taking it
+            members, owner = _ranges(group_ptr, group[first])
+            pairs = np.unique(owner * n_suffix[i+1] + suffix_id[i+1][group_rows[members]])
+            sig_ptr = np.concatenate(([0], np.cumsum(np.bincount(pairs // n_suffix[i+1],
+                                                                 minlength=len(first)))))
+            buf = (pairs % n_suffix[i+1]).tobytes()
+            ptr = (sig_ptr * 8).tolist()
+            sigs = np.empty(len(first), dtype=object)
+            sigs[:] = [buf[ptr[a]:ptr[a+1]] for a in range(len(first))]
+
+            # layer -> {slice_signature: node}: arcs with equal slices share their child
+            sig_node, uniq_sigs = pd.factorize(sigs)
+            child = len(node_layer) + sig_node
+            node_layer.extend([i + 1] * len(uniq_sigs))
+            child_first = np.full(len(uniq_sigs), n_rows, dtype=np.int64)
+            np.minimum.at(child_first, sig_node, first)
+            node_first_row.extend(child_first.tolist())
+
+            visits[:, i+1] = child[inverse.ravel()]
+            arc_parent.append(arc_keys // stride)
+            arc_code.append(arc_keys % stride)
+            arc_child.append(child)
+            arc_first_row.append(first)
+
+        # Number nodes (and order each node's arcs) by first visit in row order, as
+        # inserting the rows one at a time would.
+        n_nodes = len(node_layer)
+        rank = np.empty(n_nodes, dtype=np.int64)
+        rank[np.lexsort((node_layer, node_first_row))] = np.arange(n_nodes)
         root = 0
-        nodes.append(Node(layer=0, edges={}, edge_counts={}, reach_count=0, terminal_count=0))
-
-        # layer -> {slice_signature: node_id}
-        slice_index: List[Dict[Tuple, int]] = [dict() for _ in range(len(self.dim_names) + 1)]
-        slice_index[0][("<SOURCE>",)] = root
-
-        for _, row in working.iterrows():
-            current = root
-            nodes[current].reach_count += 1
-            prefix: Dict[str, Any] = {}
-
-            for i, dim in enumerate(self.dim_names):
-                v = row[dim]
-                prefix[dim] = v
-                remaining = self.dim_names[i+1:]
-                n = nodes[current]
-
-                if v in n.edges:
-                    n.edge_counts[v] = n.edge_counts.get(v, 0) + 1
-                    current = n.edges[v]
-                    nodes[current].reach_count += 1
-                    continue
-
-                # slice := π_P(σ_R(CB))
-                mask = pd.Series(True, index=working.index)
-                for k, val in prefix.items():
-                    mask &= (working[k] == val)
-                selected = working.loc[mask]
-                sig = _slice_signature(selected, remaining)
-
-                nxt_layer = i + 1
-                if sig in slice_index[nxt_layer]:
-                    next_id = slice_index[nxt_layer][sig]
-                else:
-                    next_id = len(nodes)
-                    nodes.append(Node(layer=nxt_layer, edges={}, edge_counts={}, reach_count=0, terminal_count=0))
-                    slice_index[nxt_layer][sig] = next_id
-
-                n.edges[v] = next_id
-                n.edge_counts[v] = n.edge_counts.get(v, 0) + 1
-                current = next_id
-                nodes[current].reach_count += 1
-
-            nodes[current].terminal_count += 1
-
-        terminal_layer = len(self.dim_names)
+        nodes: List[Node] = [None] * n_nodes  # type: ignore[list-item]
+        reach = np.bincount(rank[visits.ravel()], minlength=n_nodes).tolist()
+        terminal = np.bincount(rank[visits[:, depth]], minlength=n_nodes).tolist()
+        for old, new in enumerate(rank.tolist()):
+            nodes[new] = Node(layer=node_layer[old], edges={}, edge_counts={},
+                              reach_count=reach[new], terminal_count=terminal[new])
+
+        # rows per arc, one layer at a time
+        for i in range(depth):
+            arc_count = np.bincount(np.searchsorted(arc_parent[i] * stride + arc_code[i],
+                                                    visits[:, i] * stride + codes[:, i]),
+                                    minlength=len(arc_code[i]))
+            order = np.argsort(arc_first_row[i], kind="stable")
+            layer_labels = labels[i]
+            for parent, code, child, cnt in zip(rank[arc_parent[i][order]].tolist(),
+                                                arc_code[i][order].tolist(),
+                                                rank[arc_child[i][order]].tolist(),
+                                                arc_count[order].tolist()):
+                n = nodes[parent]
+                v = layer_labels[code]
+                n.edges[v] = child
+                n.edge_counts[v] = cnt
+
+        terminal_layer = depth
         return nodes, root, terminal_layer
+
+
+def _ranges(ptr: np.ndarray, which: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenated index ranges ptr[w]:ptr[w+1] for w in `which`, with the position in
+    `which` each index came from."""
+    starts = ptr[which]
+    lengths = ptr[which + 1] - starts
+    offsets = np.cumsum(lengths) - lengths
+    idx = np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+    return idx, np.repeat(np.arange(len(which)), lengths)
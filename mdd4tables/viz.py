@@ -1,5 +1,8 @@
 from __future__ import annotations
 from typing import Any, Dict, Optional
+
+import numpy as np
+
 from .mdd import MDD
 
 def to_networkx(mdd: MDD):
@@ -9,10 +12,12 @@ def to_networkx(mdd: MDD):
         raise ImportError("Install extra 'viz': pip install mdd4tables[viz]") from e
 
     G = nx.DiGraph()
-    for i, n in enumerate(mdd.nodes):
-        G.add_node(i, layer=n.layer, reach=n.reach_count, terminal=n.terminal_count)
-        for lab, ch in n.edges.items():
-            G.add_edge(i, ch, label=str(lab), count=n.edge_counts.get(lab, 0))
+    # one bulk call each for nodes and arcs, rather than one add_node/add_edge per item
+    G.add_nodes_from((i, {"layer": n.layer, "reach": n.reach_count, "terminal": n.terminal_count})
+                     for i, n in enumerate(mdd.nodes))
+    G.add_edges_from((i, ch, {"label": str(lab), "count": cnt})
+                     for i, n in enumerate(mdd.nodes)
+                     for (lab, ch), cnt in zip(n.edges.items(), n.edge_counts.values()))
     return G
 
 def draw(mdd: MDD, max_nodes: int = 500, show_edge_labels: bool = True, figsize: Optional[tuple] = None):
@@ -25,15 +30,12 @@ def draw(mdd: MDD, max_nodes: int = 500, show_edge_labels: bool = True, figsize:
     if G.number_of_nodes() > max_nodes:
         raise ValueError(f"Too many nodes to draw ({G.number_of_nodes()}); increase max_nodes or filter.")
 
-    # simple layered layout
-    layers = {}
-    for node, data in G.nodes(data=True):
-        layers.setdefault(data["layer"], []).append(node)
-
-    pos = {}
-    for layer, nodes in layers.items():
-        for j, node in enumerate(nodes):
-            pos[node] = (layer * 3, -j * 2)
+    # simple layered layout: nodes bucketed by layer (in id order), stacked downwards
+    layer_of = np.array([n.layer for n in mdd.nodes], dtype=np.int64)
+    order = np.argsort(layer_of, kind="stable")
+    layer_start = np.searchsorted(layer_of[order], layer_of[order])
+    pos = dict(zip(order.tolist(), zip((layer_of[order] * 3).tolist(),
+                                       (-(np.arange(len(order)) - layer_start) * 2).tolist())))
 
     if figsize is None:
         figsize = (min(16, 3 + mdd.terminal_layer*3), max(8, len(mdd.nodes) * 0.5))
@@ -59,14 +61,10 @@ def draw(mdd: MDD, max_nodes: int = 500, show_edge_labels: bool = True, figsize:
             edge_labels[(u, v)] = f"{label}\n({count})"
         nx.draw_networkx_edge_labels(G, pos, edge_labels, font_size=7)
 
-    # Add layer labels
+    # Add layer labels, just above each layer's top node
     for layer in range(mdd.terminal_layer + 1):
-        if layer < len(mdd.dim_names):
-            plt.text(layer * 3, max([-j * 2 for j in range(len(layers.get(layer, [])))]) + 1.5,
-                    mdd.dim_names[layer], fontsize=10, fontweight='bold', ha='center')
-        else:
-            plt.text(layer * 3, max([-j * 2 for j in range(len(layers.get(layer, [])))]) + 1.5,
-                    'Terminal', fontsize=10, fontweight='bold', ha='center')
+        name = mdd.dim_names[layer] if layer < len(mdd.dim_names) else 'Terminal'
+        plt.text(layer * 3, 1.5, name, fontsize=10, fontweight='bold', ha='center')
 
     plt.title(f"MDD: {mdd.size()['nodes']} nodes, {mdd.size()['arcs']} arcs", fontsize=12)
     plt.axis('off')
@@ -9,13 +9,26 @@ Provides multiple visualization approaches:
 5. PyVis - Beautiful interactive network with physics simulation
 """
 
-import matplotlib.pyplot as plt
+import json
+import os
+import weakref
+
 import matplotlib.patches as mpatches
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import (EllipseCollection, LineCollection, PatchCollection,
+                                    PolyCollection)
+from matplotlib.figure import Figure
 import numpy as np
 from typing import Optional, Dict, List, Tuple
 
+# Graphviz layouts per MDD and layout program; like MDD.freeze(), this treats an MDD
+# as immutable once built
+_GRAPHVIZ_POS = weakref.WeakKeyDictionary()
+
+
 def visualize_mdd(mdd, method="hierarchical", title=None, save_path=None,
-                  max_nodes=200, figsize=(16, 12), interactive=False):
+                  max_nodes=200, figsize=(16, 12), interactive=False, node_labels=80,
+                  pyvis_hierarchical=False, auto_open=False, graphviz_prog="dot", _show=True):
     """
     Visualize MDD using various layout algorithms.
 
@@ -27,6 +40,15 @@ def visualize_mdd(mdd, method="hierarchical", title=None, save_path=None,
         max_nodes: Maximum nodes to visualize (performance limit)
         figsize: Figure size tuple
         interactive: If True and method="force", create interactive plot
+        node_labels: Draw node/edge text in matplotlib layouts: True, False, or the
+            largest node count that still gets text (text dominates render time)
+        pyvis_hierarchical: If True and method="pyvis", use vis.js' hierarchical
+            layout instead of forceAtlas2Based physics
+        auto_open: If True and method="pyvis", open the saved page in a web browser
+        graphviz_prog: Graphviz program for method="graphviz" ("dot", or "sfdp" for
+            larger MDDs)
+        _show: Internal; False keeps method="interactive" from opening its figure
+            (used by visualize_mdd_all)
     """
 
     if len(mdd.nodes) > max_nodes:
@@ -35,96 +57,288 @@ def visualize_mdd(mdd, method="hierarchical", title=None, save_path=None,
         return
 
     if method == "hierarchical":
-        return _visualize_hierarchical(mdd, title, save_path, figsize)
+        return _visualize_hierarchical(mdd, title, save_path, figsize, node_labels)
     elif method == "force":
-        return _visualize_force_directed(mdd, title, save_path, figsize, interactive)
+        return _visualize_force_directed(mdd, title, save_path, figsize, interactive,
+                                         node_labels)
     elif method == "graphviz":
-        return _visualize_graphviz(mdd, title, save_path)
+        return _visualize_graphviz(mdd, title, save_path, graphviz_prog)
     elif method == "interactive":
-        return _visualize_interactive_plotly(mdd, title, save_path)
+        return _visualize_interactive_plotly(mdd, title, save_path, _show)
     elif method == "pyvis":
-        return _visualize_pyvis(mdd, title, save_path)
+        return _visualize_pyvis(mdd, title, save_path, pyvis_hierarchical, auto_open)
     else:
         raise ValueError(f"Unknown visualization method: {method}")
 
 
+def visualize_mdd_all(mdd, methods=("hierarchical", "force"), save_path="mdd.png",
+                      n_jobs=1, **kwargs):
+    """
+    Render one MDD with several methods, optionally in parallel worker processes.
+
+    Each method is independent and writes its own file, so with n_jobs > 1 they
+    run in a process pool. Nothing is displayed, in workers or sequentially: the
+    matplotlib views draw on standalone Agg canvases (no GUI backend involved),
+    the Plotly view only writes its HTML file, and PyVis opens a browser only if
+    auto_open=True is passed.
+
+    Args:
+        mdd: The MDD object to visualize
+        methods: Methods to render, as accepted by visualize_mdd
+        save_path: Base path; method m is saved to "<stem>_<m><suffix>"
+        n_jobs: Worker processes (1 = sequential in this process, -1 = one per CPU)
+        **kwargs: Further visualize_mdd arguments, shared by all methods
+
+    Returns:
+        Dict of method -> what visualize_mdd returned for it.
+    """
+    stem, suffix = os.path.splitext(save_path)
+    jobs = [(mdd, m, f"{stem}_{m}{suffix or '.png'}", kwargs) for m in methods]
+    n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+    if n_jobs <= 1 or len(jobs) <= 1:
+        return {m: _render_job(job) for m, job in zip(methods, jobs)}
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=min(n_jobs, len(jobs))) as ex:
+        return dict(zip(methods, ex.map(_render_job, jobs)))
+
+
+def _render_job(job):
+    """Run one visualize_mdd call of visualize_mdd_all: job is (mdd, method, path, kwargs)."""
+    mdd, method, path, kwargs = job
+    return visualize_mdd(mdd, method=method, save_path=path, _show=False, **kwargs)
+
+
 def _build_graph_structure(mdd):
-    """Build graph structure from MDD for visualization."""
-    # Group nodes by layer
-    layers = {}
-    for i, n in enumerate(mdd.nodes):
-        layers.setdefault(n.layer, []).append(i)
-
-    # Build edge list with weights
-    edges = []
-    for node_id in range(len(mdd.nodes)):
-        node = mdd.nodes[node_id]
-        for label, child_id in node.edges.items():
-            weight = node.edge_counts.get(label, 1)
-            edges.append((node_id, child_id, label, weight))
+    """Build graph structure from MDD for visualization.
+
+    Returns:
+        (layers, edges): layers is (layer, slot, width), int arrays over node ids
+        giving each node's layer, its position within the layer (in node id order)
+        and the layer's node count; edges is (src, dst, weight, labels), parallel
+        arrays over all arcs grouped by source node id.
 
+    Both are read off MDD.freeze(), which is built once and cached on the MDD, so
+    every visualizer (and repeated visualize_mdd calls) shares one CSR layout
+    instead of walking the node dicts again.
+    """
+    frozen = mdd.freeze()
+
+    # Group nodes by layer: a stable sort keeps node id order within each layer
+    layer = frozen.layer.astype(np.int64)
+    _, inv, counts = np.unique(layer, return_inverse=True, return_counts=True)
+    order = np.argsort(inv, kind="stable")
+    slot = np.empty_like(layer)
+    slot[order] = np.arange(len(layer)) - (np.cumsum(counts) - counts)[inv[order]]
+    layers = (layer, slot, counts[inv])
+
+    # Edges as parallel arrays (src, dst, weight, labels), grouped by source node
+    edges = (frozen.tails, frozen.children, frozen.counts, frozen.labels)
     return layers, edges
 
 
-def _visualize_hierarchical(mdd, title, save_path, figsize):
-    """Original hierarchical layout - simple and clean."""
-    fig, ax = plt.subplots(figsize=figsize)
+def _short_labels(mdd, width):
+    """str(label)[:width] of every arc, in _build_graph_structure order.
 
-    layers, edges = _build_graph_structure(mdd)
+    Each distinct label of a layer is converted and truncated once (from the
+    frozen MDD's per-layer vocab) rather than once per arc.
+    """
+    frozen = mdd.freeze()
+    out = np.empty(len(frozen.children), dtype=object)
+    for arcs, vocab in zip(frozen.layer_arcs, frozen.vocab):
+        short = np.empty(len(vocab), dtype=object)
+        short[:] = [str(v)[:width] for v in vocab]
+        out[arcs] = short[frozen.label_codes[arcs]]
+    return out
+
+
+def _short_layer_names(mdd, width, missing="?"):
+    """Object array of dim_name[:width] per layer, plus `missing` for the terminal layer;
+    index it with np.minimum(layer, len(mdd.dim_names))."""
+    names = np.empty(len(mdd.dim_names) + 1, dtype=object)
+    names[:] = [name[:width] for name in mdd.dim_names] + [missing]
+    return names
+
+
+def _draw_arrows(ax, start, end, linewidths, alpha, color='gray', head=0.2):
+    """Draw straight arrows start[i] -> end[i] ((E, 2) arrays) as two artists.
+
+    Shafts go into one LineCollection and heads (filled triangles, `head` data
+    units long) into one PolyCollection, rather than one annotate() artist per edge.
+    Both are rasterized, so vector output (PDF/SVG) embeds the edges as one image
+    instead of a path per edge; text stays vector.
+    """
+    from matplotlib.colors import to_rgba
 
-    # Calculate positions - top to bottom layout
-    pos = {}
-    max_width = max(len(nodes) for nodes in layers.values())
+    rgba = np.tile(to_rgba(color), (len(start), 1))
+    rgba[:, 3] = alpha
+    ax.add_collection(LineCollection(np.stack([start, end], axis=1),
+                                     linewidths=linewidths, colors=rgba, rasterized=True))
 
-    for layer, nodes in layers.items():
-        width = len(nodes)
-        for j, node_id in enumerate(nodes):
-            x = (j - (width - 1) / 2) * 2.0
-            y = -layer * 2.5
-            pos[node_id] = (x, y)
+    d = end - start
+    unit = d / np.maximum(np.hypot(d[:, 0], d[:, 1]), 1e-12)[:, None]
+    normal = unit[:, ::-1] * (-1.0, 1.0)
+    base = end - unit * head
+    heads = np.stack([end, base + normal * head / 2, base - normal * head / 2], axis=1)
+    ax.add_collection(PolyCollection(heads, facecolors=rgba, edgecolors='none',
+                                     rasterized=True))
 
-    # Draw edges
-    for node_id, child_id, label, weight in edges:
-        x, y = pos[node_id]
-        cx, cy = pos[child_id]
 
-        # Edge thickness by weight
-        max_weight = max(e[3] for e in edges)
-        lw = 0.5 + 2.5 * (weight / max_weight)
-        alpha = 0.3 + 0.5 * (weight / max_weight)
+def _new_figure(figsize):
+    """A Figure on its own Agg canvas, outside pyplot.
 
-        ax.annotate("", xy=(cx, cy + 0.3), xytext=(x, y - 0.3),
-                   arrowprops=dict(arrowstyle='->', color='gray',
-                                  alpha=alpha, lw=lw))
+    The matplotlib views only ever save their figure, so they skip pyplot's figure
+    manager: no GUI window is created whatever the session's backend is, nothing
+    has to be closed afterwards, and renders share no global pyplot state.
+    """
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
 
-        # Edge labels for small fan-out
-        node = mdd.nodes[node_id]
-        if len(node.edges) <= 4:
-            mid_x, mid_y = (x + cx) / 2, (y + cy) / 2
-            label_str = str(label)[:12]
-            ax.text(mid_x + 0.2, mid_y, label_str, fontsize=7,
-                   color='gray', ha='left', va='center', alpha=0.7)
 
-    # Draw nodes
-    colors = ['#3498db', '#9b59b6', '#e74c3c', '#f39c12', '#1abc9c', '#34495e', '#e67e22']
-    for node_id, (x, y) in pos.items():
-        node = mdd.nodes[node_id]
+def _save_dpi(mdd):
+    """Output dpi: 150, or 100 for MDDs over 100 nodes (less than half the pixels to
+    rasterize and encode for the figures that have the most artists)."""
+    return 150 if len(mdd.nodes) <= 100 else 100
 
-        if node.terminal_count > 0:
-            rect = mpatches.FancyBboxPatch((x - 0.25, y - 0.25), 0.5, 0.5,
-                                           boxstyle="round,pad=0.05",
-                                           facecolor='#27ae60', edgecolor='#229954',
-                                           linewidth=2)
-            ax.add_patch(rect)
+
+def _draw_text(mdd, node_labels):
+    """Whether to draw text artists: node_labels is a bool, or a max node count."""
+    if isinstance(node_labels, bool):
+        return node_labels
+    return len(mdd.nodes) <= node_labels
+
+
+def _node_arrays(mdd, pos):
+    """(xy, terminal): a layout's {node_id: (x, y)} as an (N, 2) array, and the
+    boolean mask of terminal nodes."""
+    xy = np.array([pos[i] for i in range(len(mdd.nodes))], dtype=float).reshape(-1, 2)
+    terminal = mdd.freeze().terminal_counts > 0
+    return xy, terminal
+
+
+def _draw_circles(ax, xy, radius, facecolors, edgecolor, zorder=1):
+    """Draw circles of `radius` data units centered at the (N, 2) `xy` as one artist."""
+    d = 2 * radius
+    ax.add_collection(EllipseCollection(d, d, 0, units='xy', offsets=xy,
+                                        offset_transform=ax.transData,
+                                        facecolors=facecolors, edgecolors=edgecolor,
+                                        linewidths=2, zorder=zorder))
+
+
+def _spring_layout(pos, src, dst, weight, k, iterations=100, scale=5.0, threshold=1e-4):
+    """Fruchterman-Reingold layout of a directed weighted graph given as arc arrays.
+
+    The same update as networkx.spring_layout (each node is attracted to its
+    children, weighted by arc count, and repelled by all nodes), run directly on
+    the arrays of _build_graph_structure without building a NetworkX graph. Only
+    the repulsion is dense: it works on x and y as (N, N) planes in place, while
+    the attraction is summed over the arcs with bincount rather than an (N, N)
+    adjacency matrix that is zero almost everywhere.
+
+    Args:
+        pos: (N, 2) initial positions.
+        src, dst, weight: Parallel arc arrays; arcs between the same pair add up.
+        k: Optimal distance between nodes.
+        iterations: Maximum number of iterations (linear cooling).
+        scale: Half-width of the returned layout, centered on the origin.
+        threshold: Stop once the mean node displacement falls below this.
+
+    Returns:
+        (N, 2) float array of positions.
+    """
+    n = len(pos)
+    if n < 2:
+        return np.zeros((n, 2))
+    x = np.array(pos[:, 0], dtype=float)
+    y = np.array(pos[:, 1], dtype=float)
+    pull = np.asarray(weight, dtype=float) / k
+
+    # the initial "temperature" (largest step) is 0.1 of the domain, cooled linearly
+    t = max(np.ptp(x), np.ptp(y)) * 0.1
+    dt = t / (iterations + 1)
+    for _ in range(iterations):
+        # repulsion k^2 / d along every pair, with d clipped to at least 0.01
+        dx = x[:, None] - x[None, :]
+        dy = y[:, None] - y[None, :]
+        push = dx * dx
+        push += dy * dy
+        np.clip(push, 1e-4, None, out=push)
+        np.divide(k * k, push, out=push)
+        dx *= push
+        dy *= push
+        mx = dx.sum(axis=1)
+        my = dy.sum(axis=1)
+
+        # attraction w * d^2 / k along each arc, on its source node
+        ex = x[src] - x[dst]
+        ey = y[src] - y[dst]
+        arc = pull * np.clip(np.hypot(ex, ey), 0.01, None)
+        mx -= np.bincount(src, ex * arc, minlength=n)
+        my -= np.bincount(src, ey * arc, minlength=n)
+
+        step = t / np.clip(np.hypot(mx, my), 0.01, None)
+        mx *= step
+        my *= step
+        x += mx
+        y += my
+        t -= dt
+        if np.sqrt((mx * mx + my * my).sum()) / n < threshold:
+            break
+
+    xy = np.column_stack([x, y])
+    xy -= xy.mean(axis=0)
+    lim = np.abs(xy).max()
+    return xy * (scale / lim) if lim > 0 else xy
+
+
+def _visualize_hierarchical(mdd, title, save_path, figsize, node_labels=80):
+    """Original hierarchical layout - simple and clean."""
+    fig = _new_figure(figsize)
+    ax = fig.subplots()
+    draw_text = _draw_text(mdd, node_labels)
+
+    layers, edges = _build_graph_structure(mdd)
+
+    # Calculate positions - top to bottom layout, one (x, y) row per node
+    layer, slot, width = layers
+    pos = np.column_stack([(slot - (width - 1) / 2) * 2.0, -layer * 2.5])
+    max_width = width.max()
+    n_layers = len(np.unique(layer))
+
+    # Draw edges, thickness by weight: one collection for all shafts, one for all heads
+    src, dst, weight, _ = edges
+    if len(src):
+        frac = weight / weight.max()
+        start = pos[src] - (0.0, 0.3)
+        end = pos[dst] + (0.0, 0.3)
+        _draw_arrows(ax, start, end, linewidths=0.5 + 2.5 * frac, alpha=0.3 + 0.5 * frac)
+
+    # Edge labels for small fan-out
+    small = (np.bincount(src, minlength=len(mdd.nodes))[src] <= 4) & draw_text
+    mid = (pos[src[small]] + pos[dst[small]]) / 2
+    short = _short_labels(mdd, 12)[small] if small.any() else []
+    for (mid_x, mid_y), label_str in zip(mid.tolist(), short):
+        ax.text(mid_x + 0.2, mid_y, label_str, fontsize=7,
+               color='gray', ha='left', va='center', alpha=0.7)
+
+    # Draw nodes: terminals as one collection of rounded boxes, decision nodes as one
+    # collection of circles colored by layer
+    colors = ['#3498db', '#9b59b6', '#e74c3c', '#f39c12', '#1abc9c', '#34495e', '#e67e22']
+    _, terminal = _node_arrays(mdd, pos)
+    boxes = [mpatches.FancyBboxPatch((x - 0.25, y - 0.25), 0.5, 0.5, boxstyle="round,pad=0.05")
+             for x, y in pos[terminal].tolist()]
+    ax.add_collection(PatchCollection(boxes, facecolors='#27ae60', edgecolors='#229954',
+                                      linewidths=2))
+    _draw_circles(ax, pos[~terminal], 0.35, np.array(colors)[layer[~terminal] % len(colors)],
+                  edgecolor='#2c3e50')
+
+    if draw_text:
+        for x, y in pos[terminal].tolist():
             ax.text(x, y, f"✓", fontsize=10, fontweight='bold',
                    ha='center', va='center', color='white')
-        else:
-            layer_name = mdd.dim_names[node.layer] if node.layer < len(mdd.dim_names) else "?"
-            color = colors[node.layer % len(colors)]
-            circle = plt.Circle((x, y), 0.35, facecolor=color,
-                                edgecolor='#2c3e50', linewidth=2)
-            ax.add_patch(circle)
-            label_text = layer_name[:8]
+        names = _short_layer_names(mdd, 8)[np.minimum(layer[~terminal], len(mdd.dim_names))]
+        for (x, y), label_text in zip(pos[~terminal].tolist(), names):
             ax.text(x, y, label_text, fontsize=8, fontweight='bold',
                    ha='center', va='center', color='white')
 
@@ -132,66 +346,34 @@ def _visualize_hierarchical(mdd, title, save_path, figsize):
     if title:
         ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
     ax.set_xlim(-max_width * 1.2, max_width * 1.2)
-    ax.set_ylim(-len(layers) * 2.5 - 1, 1.5)
+    ax.set_ylim(-n_layers * 2.5 - 1, 1.5)
     ax.set_aspect('equal')
     ax.axis('off')
 
-    plt.tight_layout()
+    fig.tight_layout()
     if save_path:
-        plt.savefig(save_path, dpi=150, bbox_inches='tight', facecolor='white')
+        fig.savefig(save_path, dpi=_save_dpi(mdd), bbox_inches='tight', facecolor='white')
         print(f"Saved: {save_path}")
-    plt.close()
 
 
-def _visualize_force_directed(mdd, title, save_path, figsize, interactive):
-    """Physics-based force-directed layout using NetworkX spring algorithm."""
-    try:
-        import networkx as nx
-    except ImportError:
-        print("Force-directed visualization requires networkx.")
-        print("Install with: pip install networkx")
-        return
-
-    # Build NetworkX graph
-    G = nx.DiGraph()
-
-    # Add nodes with layer attribute
-    for i, node in enumerate(mdd.nodes):
-        G.add_node(i, layer=node.layer, terminal=node.terminal_count > 0)
-
-    # Add weighted edges
-    for node_id in range(len(mdd.nodes)):
-        node = mdd.nodes[node_id]
-        for label, child_id in node.edges.items():
-            weight = node.edge_counts.get(label, 1)
-            G.add_edge(node_id, child_id, weight=weight, label=label)
+def _visualize_force_directed(mdd, title, save_path, figsize, interactive, node_labels=80):
+    """Physics-based force-directed (Fruchterman-Reingold spring) layout."""
+    (layer, slot, width), (src, dst, weights, _) = _build_graph_structure(mdd)
 
     # Spring layout with customization
     # Use layer as initial y-coordinate hint for better hierarchical structure
-    pos_hint = {}
-    layers, _ = _build_graph_structure(mdd)
-    for layer, nodes in layers.items():
-        for i, node_id in enumerate(nodes):
-            x = (i - len(nodes)/2) * 0.3
-            y = -layer * 2.0
-            pos_hint[node_id] = np.array([x, y])
-
-    # Spring layout with position hints
-    pos = nx.spring_layout(G, pos=pos_hint, k=2.0, iterations=100,
-                          weight='weight', seed=42, scale=5)
+    pos_hint = np.column_stack([(slot - width / 2) * 0.3, -layer * 2.0])
+    pos = _spring_layout(pos_hint, src, dst, weights, k=2.0, iterations=100, scale=5)
 
     # Create figure
-    fig, ax = plt.subplots(figsize=figsize)
+    fig = _new_figure(figsize)
+    ax = fig.subplots()
 
     # Draw edges with varying width
-    edges = G.edges(data=True)
-    weights = [e[2]['weight'] for e in edges]
-    max_weight = max(weights) if weights else 1
+    max_weight = weights.max() if len(weights) else 1
 
-    for (u, v, data) in edges:
-        x1, y1 = pos[u]
-        x2, y2 = pos[v]
-        weight = data['weight']
+    for (x1, y1), (x2, y2), weight in zip(pos[src].tolist(), pos[dst].tolist(),
+                                          weights.tolist()):
         lw = 0.5 + 3.0 * (weight / max_weight)
         alpha = 0.3 + 0.5 * (weight / max_weight)
 
@@ -200,23 +382,16 @@ def _visualize_force_directed(mdd, title, save_path, figsize, interactive):
                                   alpha=alpha, lw=lw,
                                   connectionstyle="arc3,rad=0.1"))
 
-    # Draw nodes
+    # Draw nodes: one collection for terminals, one for decision nodes colored by layer
     colors = ['#3498db', '#9b59b6', '#e74c3c', '#f39c12', '#1abc9c', '#34495e', '#e67e22']
-    for node_id in G.nodes():
-        x, y = pos[node_id]
-        node = mdd.nodes[node_id]
-
-        if node.terminal_count > 0:
-            circle = plt.Circle((x, y), 0.15, facecolor='#27ae60',
-                                edgecolor='#229954', linewidth=2, zorder=3)
-            ax.add_patch(circle)
+    xy, terminal = _node_arrays(mdd, pos)
+    _draw_circles(ax, xy[terminal], 0.15, '#27ae60', edgecolor='#229954', zorder=3)
+    _draw_circles(ax, xy[~terminal], 0.2, np.array(colors)[layer[~terminal] % len(colors)],
+                  edgecolor='#2c3e50', zorder=3)
+    if _draw_text(mdd, node_labels):
+        for x, y in xy[terminal].tolist():
             ax.text(x, y, "✓", fontsize=8, fontweight='bold',
                    ha='center', va='center', color='white', zorder=4)
-        else:
-            color = colors[node.layer % len(colors)]
-            circle = plt.Circle((x, y), 0.2, facecolor=color,
-                                edgecolor='#2c3e50', linewidth=2, zorder=3)
-            ax.add_patch(circle)
 
     # Title and formatting
     if title:
@@ -224,129 +399,139 @@ def _visualize_force_directed(mdd, title, save_path, figsize, interactive):
     ax.axis('equal')
     ax.axis('off')
 
-    plt.tight_layout()
+    fig.tight_layout()
     if save_path:
-        plt.savefig(save_path, dpi=150, bbox_inches='tight', facecolor='white')
+        fig.savefig(save_path, dpi=_save_dpi(mdd), bbox_inches='tight', facecolor='white')
         print(f"Saved: {save_path}")
-    plt.close()
 
 
-def _visualize_graphviz(mdd, title, save_path):
-    """Professional hierarchical layout using Graphviz."""
+def _visualize_graphviz(mdd, title, save_path, prog='dot'):
+    """Professional hierarchical layout using Graphviz.
+
+    The layout of each (MDD, prog) is computed once and cached, since every call
+    otherwise launches the Graphviz binary again. prog is any Graphviz layout
+    program; "sfdp" is much faster than "dot" on graphs of a hundred nodes or more.
+    """
     try:
         import networkx as nx
-        from networkx.drawing.nx_agraph import graphviz_layout
     except ImportError:
         print("Graphviz visualization requires networkx and pygraphviz.")
         print("Install with: pip install networkx pygraphviz")
-        print("Note: pygraphviz requires graphviz to be installed system-wide")
-        print("  macOS: brew install graphviz")
-        print("  Linux: sudo apt-get install graphviz graphviz-dev")
         return
 
-    # Build NetworkX graph
-    G = nx.DiGraph()
-
-    # Add nodes
-    for i, node in enumerate(mdd.nodes):
-        layer_name = mdd.dim_names[node.layer] if node.layer < len(mdd.dim_names) else "T"
-        label = f"{layer_name[:8]}\n#{i}"
-        if node.terminal_count > 0:
-            label = f"✓\n{node.terminal_count}"
-        G.add_node(i, label=label, layer=node.layer)
-
-    # Add edges
-    for node_id in range(len(mdd.nodes)):
-        node = mdd.nodes[node_id]
-        for label, child_id in node.edges.items():
-            weight = node.edge_counts.get(label, 1)
-            G.add_edge(node_id, child_id, weight=weight, label=str(label)[:10])
-
-    # Use graphviz dot layout
+    # networkx only imports pygraphviz when a layout is requested, so check for it
+    # here; pydot also works but round-trips through DOT text and is much slower
     try:
-        pos = graphviz_layout(G, prog='dot')
-    except Exception as e:
-        print(f"Graphviz layout failed: {e}")
-        print("Falling back to hierarchical layout...")
-        return _visualize_hierarchical(mdd, title, save_path, (16, 12))
+        import pygraphviz  # noqa: F401
+        from networkx.drawing.nx_agraph import graphviz_layout
+    except ImportError:
+        try:
+            import pydot  # noqa: F401
+            from networkx.drawing.nx_pydot import graphviz_layout
+        except ImportError:
+            print("Graphviz visualization requires pygraphviz (or pydot).")
+            print("Install with: pip install pygraphviz")
+            print("Note: pygraphviz requires graphviz to be installed system-wide")
+            print("  macOS: brew install graphviz")
+            print("  Linux: sudo apt-get install graphviz graphviz-dev")
+            print("Falling back to hierarchical layout...")
+            return _visualize_hierarchical(mdd, title, save_path, (16, 12))
+        print("pygraphviz not found; falling back to pydot, which is ~5x slower for "
+              "large graphs. Install with: pip install pygraphviz")
+
+    (layer, _, _), (src, dst, weights, _) = _build_graph_structure(mdd)
+    cached = _GRAPHVIZ_POS.setdefault(mdd, {})
+    if prog not in cached:
+        # Build NetworkX graph
+        G = nx.DiGraph()
+
+        # Add nodes
+        names = _short_layer_names(mdd, 8, missing="T")
+        for i, node in enumerate(mdd.nodes):
+            label = f"{names[min(node.layer, len(mdd.dim_names))]}\n#{i}"
+            if node.terminal_count > 0:
+                label = f"✓\n{node.terminal_count}"
+            G.add_node(i, label=label, layer=node.layer)
+
+        # Add edges
+        G.add_edges_from((u, v, {'weight': w, 'label': lab})
+                         for u, v, w, lab in zip(src.tolist(), dst.tolist(), weights.tolist(),
+                                                 _short_labels(mdd, 10)))
+
+        # Use graphviz layout
+        try:
+            cached[prog] = graphviz_layout(G, prog=prog)
+        except Exception as e:
+            print(f"Graphviz layout failed: {e}")
+            print("Falling back to hierarchical layout...")
+            return _visualize_hierarchical(mdd, title, save_path, (16, 12))
+    pos = cached[prog]
 
     # Draw
-    fig, ax = plt.subplots(figsize=(16, 12))
+    fig = _new_figure((16, 12))
+    ax = fig.subplots()
 
     # Draw edges
-    for (u, v, data) in G.edges(data=True):
+    for u, v in zip(src.tolist(), dst.tolist()):
         x1, y1 = pos[u]
         x2, y2 = pos[v]
-        weight = data.get('weight', 1)
         ax.annotate("", xy=(x2, y2), xytext=(x1, y1),
                    arrowprops=dict(arrowstyle='->', color='gray',
                                   lw=1.5, alpha=0.6))
 
-    # Draw nodes
+    # Draw nodes: one collection for terminals, one for decision nodes colored by layer
     colors = ['#3498db', '#9b59b6', '#e74c3c', '#f39c12', '#1abc9c', '#34495e', '#e67e22']
-    for node_id in G.nodes():
-        x, y = pos[node_id]
-        node = mdd.nodes[node_id]
-
-        if node.terminal_count > 0:
-            circle = plt.Circle((x, y), 20, facecolor='#27ae60',
-                                edgecolor='#229954', linewidth=2)
-            ax.add_patch(circle)
-        else:
-            color = colors[node.layer % len(colors)]
-            circle = plt.Circle((x, y), 25, facecolor=color,
-                                edgecolor='#2c3e50', linewidth=2)
-            ax.add_patch(circle)
+    xy, terminal = _node_arrays(mdd, pos)
+    _draw_circles(ax, xy[terminal], 20, '#27ae60', edgecolor='#229954')
+    _draw_circles(ax, xy[~terminal], 25, np.array(colors)[layer[~terminal] % len(colors)],
+                  edgecolor='#2c3e50')
 
     if title:
         ax.set_title(title, fontsize=16, fontweight='bold', pad=20)
     ax.axis('equal')
     ax.axis('off')
 
-    plt.tight_layout()
+    fig.tight_layout()
     if save_path:
-        plt.savefig(save_path, dpi=150, bbox_inches='tight', facecolor='white')
+        fig.savefig(save_path, dpi=_save_dpi(mdd), bbox_inches='tight', facecolor='white')
         print(f"Saved: {save_path}")
-    plt.close()
 
 
-def _visualize_interactive_plotly(mdd, title, save_path):
-    """Interactive visualization using Plotly."""
+def _visualize_interactive_plotly(mdd, title, save_path, show=True):
+    """Interactive visualization using Plotly; show=False only writes the HTML file."""
     try:
         import plotly.graph_objects as go
-        import networkx as nx
     except ImportError:
-        print("Interactive visualization requires plotly and networkx.")
-        print("Install with: pip install plotly networkx")
+        print("Interactive visualization requires plotly.")
+        print("Install with: pip install plotly")
         return
 
-    # Build NetworkX graph
-    G = nx.DiGraph()
-    for i, node in enumerate(mdd.nodes):
-        G.add_node(i, layer=node.layer, terminal=node.terminal_count > 0)
-
-    for node_id in range(len(mdd.nodes)):
-        node = mdd.nodes[node_id]
-        for label, child_id in node.edges.items():
-            weight = node.edge_counts.get(label, 1)
-            G.add_edge(node_id, child_id, weight=weight, label=str(label))
-
-    # Layout
-    pos = nx.spring_layout(G, k=2.0, iterations=50, seed=42)
+    # Layout: spring layout from random initial positions
+    _, (src, dst, weights, _) = _build_graph_structure(mdd)
+    rng = np.random.default_rng(42)
+    pos = _spring_layout(rng.random((len(mdd.nodes), 2)), src, dst, weights,
+                         k=2.0, iterations=50, scale=1)
 
-    # Create edges
+    # Create edges: one trace per weight bucket (4 at most), each holding all of its
+    # segments separated by None gaps, rather than one trace per edge
     edge_trace = []
-    for (u, v, data) in G.edges(data=True):
-        x0, y0 = pos[u]
-        x1, y1 = pos[v]
-        edge_trace.append(go.Scatter(
-            x=[x0, x1, None],
-            y=[y0, y1, None],
-            mode='lines',
-            line=dict(width=0.5 + data['weight']*0.5, color='#888'),
-            hoverinfo='none',
-            showlegend=False
-        ))
+    if len(weights):
+        bounds = np.linspace(weights.min(), weights.max(), 5)
+        bucket = np.clip(np.searchsorted(bounds, weights, side='right') - 1, 0, 3)
+        for b in np.unique(bucket).tolist():
+            sel = bucket == b
+            xs = np.full((sel.sum(), 3), None, dtype=object)
+            ys = np.full((sel.sum(), 3), None, dtype=object)
+            xs[:, 0], xs[:, 1] = pos[src[sel], 0], pos[dst[sel], 0]
+            ys[:, 0], ys[:, 1] = pos[src[sel], 1], pos[dst[sel], 1]
+            edge_trace.append(go.Scatter(
+                x=xs.ravel().tolist(),
+                y=ys.ravel().tolist(),
+                mode='lines',
+                line=dict(width=0.5 + weights[sel].mean()*0.5, color='#888'),
+                hoverinfo='none',
+                showlegend=False
+            ))
 
     # Create nodes
     node_x = []
@@ -355,8 +540,7 @@ def _visualize_interactive_plotly(mdd, title, save_path):
     node_color = []
 
     colors = ['#3498db', '#9b59b6', '#e74c3c', '#f39c12', '#1abc9c', '#34495e', '#e67e22']
-    for node_id in G.nodes():
-        x, y = pos[node_id]
+    for node_id, (x, y) in enumerate(pos.tolist()):
         node_x.append(x)
         node_y.append(y)
 
@@ -398,19 +582,27 @@ def _visualize_interactive_plotly(mdd, title, save_path):
         print(f"Saved interactive visualization: {html_path}")
         print("Open in browser to interact with the graph.")
 
-    fig.show()
+    if show:
+        fig.show()
 
 
-def _visualize_pyvis(mdd, title, save_path):
+def _visualize_pyvis(mdd, title, save_path, hierarchical=False, auto_open=False):
     """
     Beautiful interactive network visualization using PyVis.
 
+    Physics uses the forceAtlas2Based solver; hierarchical=True switches to vis.js'
+    hierarchical layout with the hierarchicalRepulsion solver instead. The page is
+    opened in a browser only if auto_open is True.
+
     Creates an HTML file with:
     - Physics simulation (nodes repel, edges attract)
     - Drag nodes to reposition
     - Click nodes for details
     - Zoom and pan
     - Configurable physics parameters
+
+    Returns:
+        An IPython IFrame of the page inside a Jupyter notebook, else the HTML path.
     """
     try:
         from pyvis.network import Network
@@ -429,41 +621,65 @@ def _visualize_pyvis(mdd, title, save_path):
         notebook=False
     )
 
-    # Configure physics for better layout
-    net.set_options("""
-    {
-      "physics": {
-        "enabled": true,
-        "hierarchicalRepulsion": {
-          "centralGravity": 0.0,
-          "springLength": 200,
-          "springConstant": 0.01,
-          "nodeDistance": 150,
-          "damping": 0.09
-        },
-        "solver": "hierarchicalRepulsion",
-        "stabilization": {
-          "enabled": true,
-          "iterations": 1000,
-          "updateInterval": 25
+    # Configure physics for better layout. Stabilizing a large graph can freeze the
+    # browser for minutes, so MDDs over 50 nodes open at precomputed layer
+    # positions with physics off, and a button in the page turns it on.
+    physics = len(mdd.nodes) <= 50
+    if hierarchical:
+        # vis.js' own layered layout, which needs the hierarchicalRepulsion solver
+        solver = {
+            "hierarchicalRepulsion": {
+                "centralGravity": 0.0,
+                "springLength": 200,
+                "springConstant": 0.01,
+                "nodeDistance": 150,
+                "damping": 0.09
+            },
+            "solver": "hierarchicalRepulsion",
         }
-      },
-      "layout": {
-        "hierarchical": {
-          "enabled": true,
-          "direction": "UD",
-          "sortMethod": "directed",
-          "levelSeparation": 200,
-          "nodeSpacing": 150,
-          "treeSpacing": 200
+    else:
+        # Barnes-Hut approximated repulsion, started from the layer positions below
+        solver = {
+            "forceAtlas2Based": {
+                "gravitationalConstant": -50,
+                "centralGravity": 0.01,
+                "springLength": 100,
+                "springConstant": 0.08,
+                "damping": 0.4,
+                "avoidOverlap": 0.5
+            },
+            "solver": "forceAtlas2Based",
+        }
+    net.set_options(json.dumps({
+        "physics": {
+            "enabled": physics,
+            **solver,
+            "stabilization": {
+                "enabled": True,
+                "iterations": 1000,
+                "updateInterval": 25
+            }
+        },
+        "layout": {
+            "hierarchical": {
+                "enabled": hierarchical and physics,
+                "direction": "UD",
+                "sortMethod": "directed",
+                "levelSeparation": 200,
+                "nodeSpacing": 150,
+                "treeSpacing": 200
+            }
         }
-      }
-    }
-    """)
+    }))
 
     # Color scheme by layer
     colors = ['#3498db', '#9b59b6', '#e74c3c', '#f39c12', '#1abc9c', '#34495e', '#e67e22']
 
+    # Initial positions: layers top to bottom, spaced like the hierarchical layout
+    (layer, slot, width), _ = _build_graph_structure(mdd)
+    node_x = ((slot - (width - 1) / 2) * 150).tolist()
+    node_y = (layer * 200).tolist()
+
     # Add nodes
     for node_id in range(len(mdd.nodes)):
         node = mdd.nodes[node_id]
@@ -501,41 +717,38 @@ def _visualize_pyvis(mdd, title, save_path):
             color=color,
             shape=shape,
             size=25 if node.terminal_count > 0 else 20,
-            level=node.layer  # For hierarchical layout
+            level=node.layer,  # For hierarchical layout
+            x=node_x[node_id],
+            y=node_y[node_id]
         )
 
     # Add edges with labels and weights
-    max_weight = max(
-        (node.edge_counts.get(label, 1)
-         for node_id, node in enumerate(mdd.nodes)
-         for label in node.edges.keys()),
-        default=1
-    )
-
-    for node_id in range(len(mdd.nodes)):
-        node = mdd.nodes[node_id]
-        for label, child_id in node.edges.items():
-            weight = node.edge_counts.get(label, 1)
-
-            # Edge width based on weight
-            edge_width = 1 + 5 * (weight / max_weight)
-
-            # Edge label (show only for significant edges or small fan-out)
-            edge_label = str(label)[:20] if len(node.edges) <= 4 or weight > max_weight * 0.3 else ""
-
-            # Hover title for edge
-            edge_title = f"<b>{label}</b><br>Count: {weight}<br>From #{node_id} to #{child_id}"
-
-            net.add_edge(
-                node_id,
-                child_id,
-                label=edge_label,
-                title=edge_title,
-                width=edge_width,
-                arrows="to",
-                color={'color': '#888888', 'opacity': 0.6},
-                smooth={'enabled': True, 'type': 'curvedCW', 'roundness': 0.2}
-            )
+    _, (src, dst, weights, labels) = _build_graph_structure(mdd)
+    max_weight = weights.max() if len(weights) else 1
+
+    # Edge width based on weight
+    edge_widths = 1 + 5 * (weights / max_weight)
+    # Edge label (show only for significant edges or small fan-out)
+    out_degree = np.bincount(src, minlength=len(mdd.nodes))[src]
+    show = (out_degree <= 4) | (weights > max_weight * 0.3)
+    edge_labels = np.where(show, _short_labels(mdd, 20), "")
+
+    for node_id, child_id, weight, label, edge_label, edge_width in zip(
+            src.tolist(), dst.tolist(), weights.tolist(), labels, edge_labels.tolist(),
+            edge_widths.tolist()):
+        # Hover title for edge
+        edge_title = f"<b>{label}</b><br>Count: {weight}<br>From #{node_id} to #{child_id}"
+
+        net.add_edge(
+            node_id,
+            child_id,
+            label=edge_label,
+            title=edge_title,
+            width=edge_width,
+            arrows="to",
+            color={'color': '#888888', 'opacity': 0.6},
+            smooth={'enabled': True, 'type': 'curvedCW', 'roundness': 0.2}
+        )
 
     # Set title
     if title:
@@ -544,6 +757,14 @@ def _visualize_pyvis(mdd, title, save_path):
     # Save to HTML
     html_path = save_path.replace('.png', '.html') if save_path else 'mdd_pyvis.html'
     net.save_graph(html_path)
+    if not physics:
+        with open(html_path, encoding="utf-8") as f:
+            html = f.read()
+        button = ('<button style="position:absolute;top:10px;right:10px;z-index:10" '
+                  'onclick="network.setOptions({physics: {enabled: true}})">'
+                  'Run physics</button>')
+        with open(html_path, "w", encoding="utf-8") as f:
+            f.write(html.replace("</body>", button + "\n</body>", 1))
 
     print(f"Saved PyVis interactive visualization: {html_path}")
     print("Features:")
@@ -551,12 +772,26 @@ def _visualize_pyvis(mdd, title, save_path):
     print("  - Hover for detailed info")
     print("  - Zoom with mouse wheel")
     print("  - Pan by dragging background")
-    print("  - Physics simulation running")
+    print("  - Physics simulation running" if physics
+          else "  - Physics off (large graph): click 'Run physics' to start it")
     print("\nOpen in browser to explore!")
 
-    # Try to open in browser
+    # Only open a browser on request: batch renders and headless runs must not
+    # spawn one per MDD
+    if auto_open:
+        try:
+            import webbrowser
+            webbrowser.open(f'file://{os.path.abspath(html_path)}')
+        except Exception:
+            print(f"Couldn't auto-open. Manually open: {html_path}")
+
+    # In a Jupyter notebook, show the page inline
     try:
-        import webbrowser
-        webbrowser.open(f'file://{html_path}')
-    except Exception:
-        print(f"Couldn't auto-open. Manually open: {html_path}")
\ No newline at end of file
+        from IPython import get_ipython
+        from IPython.display import IFrame
+    except ImportError:
+        return html_path
+    shell = get_ipython()
+    if shell is not None and "IPKernelApp" in shell.config:
+        return IFrame(html_path, width="100%", height=920)
+    return html_path
@@ -80,6 +80,7 @@ print("=" * 60)
 try:
     import matplotlib.pyplot as plt
     import matplotlib.patches as mpatches
+    from matplotlib.collections import LineCollection, PolyCollection
 
     def draw_bdd_style(mdd, title="Binary Decision Diagram", save_path=None):
         '''Draw MDD in classic BDD style with proper layout.'''
@@ -103,27 +104,30 @@ try:
                 y = -layer * 2  # Top to bottom
                 pos[node_id] = (x, y)
 
-        # Draw edges first (so they're behind nodes)
+        # Draw edges first (so they're behind nodes), all shafts as one LineCollection
+        # and all arrowheads as one PolyCollection instead of an annotate() per edge
+        segs = []
         for node_id, (x, y) in pos.items():
             node = mdd.nodes[node_id]
             for label, child_id in node.edges.items():
                 cx, cy = pos[child_id]
-
-                # Style based on label (0 = dashed, 1 = solid)
-                linestyle = '-'
-                color = 'black'
-                label_color = 'black'
-
-                # Draw edge
-                ax.annotate("", xy=(cx, cy + 0.35), xytext=(x, y - 0.35),
-                           arrowprops=dict(arrowstyle='->', color=color,
-                                          linestyle=linestyle, lw=2))
+                segs.append(((x, y - 0.35), (cx, cy + 0.35)))
 
                 # Edge label
                 mid_x, mid_y = (x + cx) / 2, (y + cy) / 2
                 offset_x = 0.25 if label == 1 else -0.25
                 ax.text(mid_x + offset_x, mid_y, str(label), fontsize=10,
-                       fontweight='bold', color=label_color, ha='center', va='center')
+                       fontweight='bold', color='black', ha='center', va='center')
+
+        if segs:
+            segs = np.array(segs, dtype=float)
+            ax.add_collection(LineCollection(segs, colors='black', linewidths=2))
+            d = segs[:, 1] - segs[:, 0]
+            unit = d / np.maximum(np.hypot(d[:, 0], d[:, 1]), 1e-12)[:, None]
+            normal = unit[:, ::-1] * (-1.0, 1.0)
+            tip, base = segs[:, 1], segs[:, 1] - unit * 0.2
+            heads = np.stack([tip, base + normal * 0.09, base - normal * 0.09], axis=1)
+            ax.add_collection(PolyCollection(heads, facecolors='black', edgecolors='none'))
 
         # Draw nodes
         for node_id, (x, y) in pos.items():
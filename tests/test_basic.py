@@ -178,6 +178,101 @@ def test_count_no_match():
     assert mdd.count({"a": "nonexistent"}) == 0
 
 
+def test_unknown_value_in_last_layer():
+    """Test an unknown value deep in the order short-circuits to no results."""
+    df = pd.DataFrame({"a": ["x", "y", "x"], "b": ["p", "q", "q"], "c": ["u", "v", "w"]})
+    schema = Schema([DimensionSpec(c, DimensionType.CATEGORICAL) for c in "abc"])
+    mdd = Builder(schema, BuildConfig(ordering="fixed")).fit(df)
+    pattern = {"a": "x", "c": "nonexistent"}
+    assert mdd.match(pattern) == []
+    assert mdd.freeze().match(pattern) == []
+    assert mdd.complete(pattern) == []
+    assert mdd.count(pattern) == 0
+    assert mdd.match({"c": "w"}) == [{"a": "x", "b": "q", "c": "w"}]
+
+
+def test_count_row_bitsets():
+    """Test count with row bitsets matches the diagram count."""
+    df = pd.DataFrame({
+        "a": ["x", "x", "y", "y", None, "y"],
+        "b": [1, 2, 1, 2, 3, 1],
+    })
+    schema = Schema([
+        DimensionSpec("a", DimensionType.CATEGORICAL),
+        DimensionSpec("b", DimensionType.ORDINAL),
+    ])
+    for method in ("trie", "slice"):
+        cfg = {"compilation_method": method, "ordering": "fixed"}
+        mdd = Builder(schema, BuildConfig(**cfg)).fit(df)
+        indexed = Builder(schema, BuildConfig(row_bitsets=True, **cfg)).fit(df)
+        for pattern in [{}, {"a": "y"}, {"b": 1}, {"a": "y", "b": 1}, {"a": "__MISSING__"},
+                        {"a": "z"}, {"a": None, "b": 2}]:
+            assert indexed.count(pattern) == mdd.count(pattern)
+
+
+def test_counts_by():
+    """Test counts_by matches one count() per value."""
+    df = pd.DataFrame({
+        "a": ["x", "x", "y", "y", "y"],
+        "b": [1, 2, 1, 2, 3],
+    })
+    schema = Schema([
+        DimensionSpec("a", DimensionType.CATEGORICAL),
+        DimensionSpec("b", DimensionType.ORDINAL),
+    ])
+    mdd = Builder(schema, BuildConfig(ordering="fixed")).fit(df)
+    assert mdd.counts_by("a") == {"x": 2, "y": 3}
+    assert mdd.counts_by("b") == {v: mdd.count({"b": v}) for v in [1, 2, 3]}
+    with pytest.raises(ValueError, match="Unknown dimension"):
+        mdd.counts_by("nonexistent")
+
+
+def test_edge_counts_array():
+    """Test flattened arc arrays agree with the node dicts."""
+    df = pd.DataFrame({
+        "a": ["x", "x", "y", "y", "y"],
+        "b": [1, 2, 1, 2, 3],
+    })
+    schema = Schema([
+        DimensionSpec("a", DimensionType.CATEGORICAL),
+        DimensionSpec("b", DimensionType.ORDINAL),
+    ])
+    mdd = Builder(schema).fit(df)
+    src, dst, counts, labels = mdd.edge_counts_array()
+    assert len(src) == mdd.size()["arcs"]
+    assert src.dtype == np.int32 and counts.dtype == np.int32
+    for s, d, c, lab in zip(src, dst, counts, labels):
+        assert mdd.nodes[s].edges[lab] == d
+        assert mdd.nodes[s].edge_counts[lab] == c
+    assert counts[src == mdd.root].sum() == len(df)
+
+
+def test_freeze_matches_dict_queries():
+    """Test the frozen CSR layout answers exists/match like the node dicts."""
+    df = pd.DataFrame({
+        "a": ["x", "x", "y", "y", "z", "z"],
+        "b": [1, 2, 1, 2, 1, 3],
+        "c": ["p", "q", "p", "q", "p", "p"],
+    })
+    schema = Schema([
+        DimensionSpec("a", DimensionType.CATEGORICAL),
+        DimensionSpec("b", DimensionType.ORDINAL),
+        DimensionSpec("c", DimensionType.CATEGORICAL),
+    ])
+    for method in ("trie", "slice"):
+        mdd = Builder(schema, BuildConfig(ordering="fixed", compilation_method=method)).fit(df)
+        frozen = mdd.freeze()
+        assert mdd.freeze() is frozen
+        assert frozen.indptr[-1] == mdd.size()["arcs"]
+        for row in df.to_dict("records") + [{"a": "x", "b": 3, "c": "p"}, {"a": "w"}]:
+            assert frozen.exists(row) == mdd.exists(row)
+        for pattern in ({}, {"b": 1}, {"a": "z", "c": "p"}, {"c": "q"}, {"b": 9}):
+            for limit in (1, 2, 1000):
+                assert frozen.match(pattern, limit=limit) == mdd.match(pattern, limit=limit)
+        with pytest.raises(ValueError):
+            frozen.match({}, limit=0)
+
+
 # ==============================================================================
 # Nearest Tests
 # ==============================================================================
@@ -219,6 +314,27 @@ def test_nearest_no_dist_fn():
     assert any(r.path["a"] == "x" and r.details["distance"] == 0.0 for r in results)
 
 
+def test_nearest_k_cheapest_paths():
+    """Test nearest returns the k cheapest distinct paths in order of distance."""
+    df = pd.DataFrame({
+        "a": [0, 0, 1, 1, 2, 2],
+        "b": [0, 3, 1, 2, 0, 5],
+    })
+    schema = Schema([
+        DimensionSpec("a", DimensionType.ORDINAL),
+        DimensionSpec("b", DimensionType.ORDINAL),
+    ])
+    mdd = Builder(schema, BuildConfig(ordering="fixed")).fit(df)
+    dist = {"a": lambda w, v: abs(w - v), "b": lambda w, v: abs(w - v)}
+    results = mdd.nearest({"a": 1, "b": 1}, dist_fns=dist, k=4)
+    assert [r.details["distance"] for r in results] == [0.0, 1.0, 2.0, 2.0]
+    assert results[0].path == {"a": 1, "b": 1}
+    assert len({tuple(r.path.items()) for r in results}) == 4
+    assert all(r.details["logprob"] < 0 for r in results)
+    plain = mdd.nearest({"a": 1, "b": 1}, dist_fns=dist, k=4, compute_logprob=False)
+    assert [r.details for r in plain] == [{"distance": r.details["distance"]} for r in results]
+
+
 # ==============================================================================
 # Numeric Binning Tests
 # ==============================================================================
@@ -283,6 +399,55 @@ def test_numeric_custom_missing_token():
     assert mdd.bin_models["num"].missing_token == "NA"
 
 
+def test_parallel_binning_matches_sequential():
+    """Test binning numeric dims on threads gives the same MDD."""
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"n1": rng.normal(size=200), "n2": rng.uniform(size=200),
+                       "c": rng.choice(["x", "y"], size=200)})
+    schema = Schema([
+        DimensionSpec("n1", DimensionType.NUMERIC, bins={"strategy": "quantile", "k": 4}),
+        DimensionSpec("n2", DimensionType.NUMERIC, bins={"strategy": "fixed_width", "k": 3}),
+        DimensionSpec("c", DimensionType.CATEGORICAL),
+    ])
+    seq = Builder(schema, BuildConfig(ordering="fixed")).fit(df)
+    par = Builder(schema, BuildConfig(ordering="fixed", binning_workers=2)).fit(df)
+    assert par.size() == seq.size()
+    for name in ("n1", "n2"):
+        assert np.array_equal(par.bin_models[name].edges, seq.bin_models[name].edges)
+    assert par.match({}, limit=1000) == seq.match({}, limit=1000)
+
+
+def test_bin_transform_matches_transform_one():
+    """Test vectorized transform agrees with the scalar path, including edges and NaN."""
+    from mdd4tables.binning import BinModel, fit_binner
+    s = pd.Series([0.0, 25.0, 50.0, 100.0, np.nan, -5.0, 500.0], index=[3, 1, 4, 1, 5, 9, 2])
+    b = fit_binner(pd.Series([0.0, 100.0]), {"strategy": "fixed_width", "k": 4},
+                   missing_token="NA")
+    out = b.transform(s)
+    assert list(out.index) == list(s.index)
+    assert list(out) == [b.transform_one(v) for v in s]
+    assert out.iloc[0] == "[0,25)"
+    assert out.iloc[3] == "[75,100]"  # last bin is closed
+    assert out.iloc[4] == "NA"
+    assert isinstance(out.dtype, pd.CategoricalDtype)
+    # edges closer than the label precision share a label
+    close = BinModel(edges=np.array([1.0, 1.0 + 1e-9, 1.0 + 2e-9, 2.0]), strategy="fixed_width",
+                     k=3)
+    assert list(close.transform(pd.Series([1.0, 1.0 + 1.5e-9, 1.5, np.nan]))) == \
+        ["[1,1)", "[1,1)", "[1,2]", close.missing_token]
+
+
+def test_quantile_edges_match_numpy():
+    """Test quantile bin edges equal np.quantile's."""
+    from mdd4tables.binning import fit_binner
+    rng = np.random.default_rng(0)
+    for x in (rng.normal(size=1001), rng.integers(0, 7, size=50).astype(float), np.array([3.0])):
+        b = fit_binner(pd.Series(x), {"strategy": "quantile", "k": 10})
+        expected = np.unique(np.quantile(x, np.linspace(0, 1, 11)))
+        if len(expected) >= 2:
+            assert np.array_equal(b.edges, expected)
+
+
 # ==============================================================================
 # Missing Value Tests
 # ==============================================================================
@@ -317,6 +482,38 @@ def test_custom_missing_token():
     assert mdd.exists({"a": "N/A", "b": 2})
 
 
+def test_fit_does_not_modify_input():
+    """Test that missing-value filling and binning leave the input frame untouched."""
+    df = pd.DataFrame({
+        "a": ["x", None, "y"],
+        "num": [1.0, np.nan, 3.0],
+    })
+    before = df.copy()
+    schema = Schema([
+        DimensionSpec("a", DimensionType.CATEGORICAL),
+        DimensionSpec("num", DimensionType.NUMERIC, bins={"strategy": "quantile", "k": 2}),
+    ])
+    for method in ("trie", "slice"):
+        mdd = Builder(schema, BuildConfig(compilation_method=method)).fit(df)
+        assert len(mdd.match({"a": "__MISSING__"})) == 1
+    pd.testing.assert_frame_equal(df, before)
+
+
+def test_categorical_dtype_missing_values():
+    """Test pandas category dtype columns accept the missing token."""
+    df = pd.DataFrame({
+        "a": pd.Series(["x", None, "y"], dtype="category"),
+        "b": [1, 2, 3],
+    })
+    schema = Schema([
+        DimensionSpec("a", DimensionType.CATEGORICAL, missing_token="UNKNOWN"),
+        DimensionSpec("b", DimensionType.ORDINAL),
+    ])
+    mdd = Builder(schema).fit(df)
+    assert mdd.count() == 3
+    assert mdd.exists({"a": "UNKNOWN", "b": 2})
+
+
 # ==============================================================================
 # Ordering Tests
 # ==============================================================================
@@ -337,6 +534,17 @@ def test_heuristic_ordering():
     assert mdd.dim_names[0] == "low_card"
 
 
+def test_heuristic_ordering_ignores_row_order():
+    """Test columns with the same value counts tie on entropy whatever the row order."""
+    a = [3, 3, 3, 4, 4, 2, 1, 4, 4, 1, 1, 3]
+    perm = [6, 10, 4, 9, 8, 1, 5, 11, 3, 2, 0, 7]
+    df = pd.DataFrame({"a": a, "b": [a[i] + 10 for i in perm]})
+    schema = Schema([DimensionSpec(c, DimensionType.CATEGORICAL) for c in "ab"])
+    from mdd4tables.ordering import propose_order
+    forward = propose_order(df, schema, OrderingConfig()).order
+    assert propose_order(df.iloc[::-1], schema, OrderingConfig()).order == forward
+
+
 def test_search_ordering():
     """Test search ordering produces valid MDD."""
     df = pd.DataFrame({
@@ -355,6 +563,19 @@ def test_search_ordering():
     assert mdd.count() == 30
 
 
+def test_parallel_search_ordering():
+    """Test scoring search swaps on threads finds an order scored consistently."""
+    from mdd4tables.ordering import evaluate_order, search_order
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({c: rng.integers(0, k, size=300) for c, k in zip("abcde", (2, 30, 5, 3, 8))})
+    schema = Schema([DimensionSpec(c, DimensionType.CATEGORICAL) for c in df.columns])
+    res = search_order(df, schema, OrderingConfig(max_evals=40, time_budget_s=10, workers=3))
+    assert sorted(res.order) == list("abcde")
+    assert res.est_score == evaluate_order(df, res.order)["prefix_distinct_sum"]
+    assert res.est_score <= evaluate_order(df, list("abcde"))["prefix_distinct_sum"]
+    assert res.diagnostics["evals"] == 40
+
+
 def test_fixed_ordering():
     """Test fixed ordering respects provided order."""
     df = pd.DataFrame({
@@ -369,6 +590,35 @@ def test_fixed_ordering():
     assert mdd.dim_names == ["b", "a"]
 
 
+def test_ordering_cached_across_fits(monkeypatch):
+    """Test repeated fits on the same data reuse the searched order."""
+    import mdd4tables.ordering as ordering
+    calls = []
+    real = ordering.search_order
+    monkeypatch.setattr(ordering, "search_order",
+                        lambda *args: calls.append(1) or real(*args))
+    df = pd.DataFrame({
+        "a": ["x", "y", "z", "x"],
+        "b": [1, 1, 1, 2],
+    })
+    schema = Schema([
+        DimensionSpec("a", DimensionType.CATEGORICAL),
+        DimensionSpec("b", DimensionType.ORDINAL),
+    ])
+    builder = Builder(schema, BuildConfig(ordering="search",
+                                          ordering_config=OrderingConfig(max_evals=5)))
+    first = builder.fit(df)
+    second = builder.fit(df.copy())
+    assert len(calls) == 1
+    assert first.dim_names == second.dim_names
+    builder.fit(df.assign(b=[1, 2, 3, 4]))
+    assert len(calls) == 2
+    # the cheap heuristic is not worth hashing the data for
+    heuristic = Builder(schema)
+    heuristic.fit(df)
+    assert not heuristic._order_cache
+
+
 # ==============================================================================
 # Reduction Tests
 # ==============================================================================
@@ -426,6 +676,47 @@ def test_reduction_disabled():
     assert mdd.size()["nodes"] >= 4  # At least root + 2 layer1 + 2 terminals
 
 
+def test_reduction_mixed_label_types():
+    """Test reduction when a column mixes numbers and the missing token."""
+    df = pd.DataFrame({
+        "a": ["x", "y", "z"],
+        "b": [1.5, None, 1.5],
+    })
+    schema = Schema([
+        DimensionSpec("a", DimensionType.CATEGORICAL),
+        DimensionSpec("b", DimensionType.ORDINAL),
+    ])
+    mdd = Builder(schema, BuildConfig(ordering="fixed")).fit(df)
+    assert mdd.count() == 3
+    assert mdd.count({"b": "__MISSING__"}) == 1
+    # "x" and "z" lead to the same sub-diagram
+    root = mdd.nodes[mdd.root]
+    assert root.edges["x"] == root.edges["z"] != root.edges["y"]
+
+
+def test_trie_structure_without_reduction():
+    """Test the raw trie: counts, native labels and first-seen edge order."""
+    df = pd.DataFrame({
+        "a": ["y", "x", "y", "y"],
+        "b": [2, 1, 1, 2],
+    })
+    schema = Schema([
+        DimensionSpec("a", DimensionType.CATEGORICAL),
+        DimensionSpec("b", DimensionType.ORDINAL),
+    ])
+    mdd = Builder(schema, BuildConfig(ordering="fixed", enable_reduction=False)).fit(df)
+    root = mdd.nodes[mdd.root]
+    assert root.reach_count == 4
+    assert list(root.edges) == ["y", "x"]
+    assert root.edge_counts == {"y": 3, "x": 1}
+    y_node = mdd.nodes[root.edges["y"]]
+    assert list(y_node.edges) == [2, 1]
+    assert all(type(lab) is int for lab in y_node.edges)
+    assert y_node.edge_counts == {2: 2, 1: 1}
+    assert mdd.nodes[y_node.edges[2]].terminal_count == 2
+    assert mdd.size() == {"nodes": 6, "arcs": 5, "layers": 2}
+
+
 # ==============================================================================
 # Edge Cases
 # ==============================================================================